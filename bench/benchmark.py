@@ -0,0 +1,231 @@
+# benchmark.py
+"""Benchmark python_interface.py against the local mock GMI server
+
+Measures cold-start time of the one-process-per-turn CLI, latency percentiles and
+throughput of send_query, live topic generation, topic pool hits and the full
+debate turn loop at several concurrency levels, and peak memory. Nothing touches the live GMI endpoint.
+
+    python benchmark.py --latency 0.3 --concurrency 1,4,16 --json results.json
+    python benchmark.py --compare results.json --tolerance 0.25   # exits 1 on regression
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from mock_gmi_server import start_mock_server
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.normpath(os.path.join(BENCH_DIR, "..", "src"))
+DUMMY_API_KEY = "bench-key-0123456789"
+
+def summarize(latencies):
+    """Return count, mean and p50/p95/p99 of a list of seconds"""
+    ordered = sorted(latencies)
+    if not ordered:
+        return {"count": 0}
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, max(0, int(-(-p * len(ordered) // 100)) - 1))]
+
+    return {"count": len(ordered), "mean": sum(ordered) / len(ordered),
+            "p50": pct(50), "p95": pct(95), "p99": pct(99)}
+
+def peak_rss_mb(who=None):
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who is None else who)
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return round(usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def configure_environment(url, cache_dir):
+    """Point python_interface at the mock server with isolated, side-effect free state"""
+    os.environ.update({
+        "GMI_API_URL": url,
+        "GMI_API_KEY": DUMMY_API_KEY,
+        "BRIGHT_MINDS_CACHE_DIR": cache_dir,
+        "GMI_METRICS_SINK": "off",
+        "GMI_RESPONSE_CACHE": "off",
+    })
+    # Injected errors should exercise the error paths, not trip the breaker for the whole run
+    os.environ.setdefault("GMI_BREAKER_FAILURE_THRESHOLD", "1000000")
+
+def bench_cold_start(url, runs):
+    """Wall time of fresh CLI processes started the way MainWindow does: fallback topic (no key) and one query against a zero-latency mock"""
+    commands = {
+        "fallback_topic": ([sys.executable, "-m", "python_interface", "topic_generator", ""], {"GMI_API_KEY": ""}),
+        "query": ([sys.executable, "-m", "python_interface", "Elon Musk", "AI Ethics"], {"GMI_API_URL": url}),
+    }
+    results = {}
+    for name, (command, overrides) in commands.items():
+        env = dict(os.environ, **overrides)
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run(command, env=env, cwd=SRC_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+            timings.append(time.perf_counter() - started)
+        results[name] = summarize(timings)
+    return results
+
+def bench_calls(fn, concurrency, count):
+    """Run fn() count times on `concurrency` threads; returns latency stats, throughput and fallback rate"""
+    def timed(_):
+        started = time.perf_counter()
+        fallback = fn()
+        return time.perf_counter() - started, fallback
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, range(count)))
+    wall = time.perf_counter() - started
+    stats = summarize([latency for latency, _ in outcomes])
+    stats.update({"throughput": count / wall if wall else 0.0,
+                  "fallback_rate": sum(1 for _, fallback in outcomes if fallback) / count})
+    return stats
+
+def bench_turn_loop(pi, concurrency, rounds):
+    """Run `concurrency` debates of `rounds` turns at once; stats are per turn"""
+    records = []
+    speakers = pi.get_speaker_registry().names()
+    debates = [{"id": f"bench-{i}", "speakers": [speakers[i % len(speakers)], speakers[(i + 1) % len(speakers)]],
+                "topic": "The Future of Work and Automation", "rounds": rounds} for i in range(concurrency)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda debate: pi.run_debate(debate, records.append), debates))
+    wall = time.perf_counter() - started
+    stats = summarize([record["elapsed"] for record in records])
+    stats.update({"throughput": len(records) / wall if wall else 0.0,
+                  "fallback_rate": sum(1 for r in records if r["fallback"]) / len(records) if records else 0.0})
+    return stats
+
+def run_benchmarks(args):
+    server, url = start_mock_server(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                    rate_limit_rate=args.rate_limit_rate,
+                                    reasoning_only_rate=args.reasoning_only_rate,
+                                    tokens_per_sec=args.tokens_per_sec)
+    instant_server, instant_url = start_mock_server(latency=0.0, jitter=0.0, tokens_per_sec=0)
+    cache_dir = tempfile.mkdtemp(prefix="bright_minds_bench_")
+    configure_environment(url, cache_dir)
+
+    results = {"config": vars(args), "cold_start": bench_cold_start(instant_url, args.cold_runs), "scenarios": {}}
+    if resource is not None:
+        results["cold_start_peak_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+
+    sys.path.insert(0, SRC_DIR)
+    import_started = time.perf_counter()
+    import python_interface as pi
+    results["import_time"] = time.perf_counter() - import_started
+
+    def query():
+        lines = []
+        pi.send_query("Elon Musk", "AI Ethics", "Steve Jobs: Design is how it works.", "", True,
+                      emit=lines.append, stream=args.stream, on_delta=lambda delta: None,
+                      on_reasoning=lambda delta: None)
+        return pi.is_fallback_output([str(line) for line in lines])
+
+    def topic():
+        # Live generation only: generate_topic() would mostly measure pops from the topic pool
+        metrics = pi.RequestMetrics("topic", "topic")
+        try:
+            pi._generate_topic(lambda line: None, metrics)
+        finally:
+            metrics.finish()
+        return bool(metrics.fields["fallback"])
+
+    def pooled_topic():
+        lines = []
+        pi.generate_topic(emit=lines.append)
+        return not lines
+
+    for concurrency in args.concurrency:
+        results["scenarios"][f"send_query@{concurrency}"] = bench_calls(query, concurrency, args.requests)
+        results["scenarios"][f"generate_topic@{concurrency}"] = bench_calls(topic, concurrency, args.requests)
+        # Stock the pool so every call is a hit and none of them falls below the low-water refill mark
+        pi.get_topic_pool().add([f"Should region {concurrency}x{i} adopt {i} day weeks"
+                                 for i in range(args.requests + pi.TOPIC_POOL_LOW_WATER)])
+        results["scenarios"][f"topic_pool@{concurrency}"] = bench_calls(pooled_topic, concurrency, args.requests)
+        results["scenarios"][f"turn_loop@{concurrency}"] = bench_turn_loop(pi, concurrency, args.rounds)
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    results["mock_requests"] = server.request_count
+    server.shutdown()
+    instant_server.shutdown()
+    return results
+
+def print_report(results):
+    print("Cold start (fresh process per call):")
+    for name, stats in results["cold_start"].items():
+        print(f"  {name:<16} p50 {stats['p50'] * 1000:8.1f} ms   p95 {stats['p95'] * 1000:8.1f} ms")
+    print(f"  module import    {results['import_time'] * 1000:8.1f} ms (in-process)")
+    print()
+    print(f"{'scenario':<22} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>8} {'fallback':>9}")
+    for name, stats in results["scenarios"].items():
+        print(f"{name:<22} {stats['count']:>6} {stats['p50'] * 1000:>9.1f} {stats['p95'] * 1000:>9.1f} "
+              f"{stats['p99'] * 1000:>9.1f} {stats['throughput']:>8.2f} {stats['fallback_rate']:>9.0%}")
+    print()
+    print(f"Peak RSS: {results['peak_rss_mb']} MB (benchmark process), "
+          f"{results.get('cold_start_peak_rss_mb')} MB (largest CLI process)")
+    print(f"Mock server handled {results['mock_requests']} requests")
+
+def find_regressions(results, baseline, tolerance):
+    """Compare against a previous --json run; latencies may grow and throughput shrink by at most tolerance"""
+    regressions = []
+    for name, stats in baseline.get("cold_start", {}).items():
+        current = results["cold_start"].get(name)
+        if current and current["p50"] > stats["p50"] * (1 + tolerance):
+            regressions.append(f"cold start {name}: p50 {stats['p50'] * 1000:.1f} -> {current['p50'] * 1000:.1f} ms")
+    for name, stats in baseline.get("scenarios", {}).items():
+        current = results["scenarios"].get(name)
+        if not current:
+            continue
+        if current["p95"] > stats["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {stats['p95'] * 1000:.1f} -> {current['p95'] * 1000:.1f} ms")
+        if current["throughput"] < stats["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {stats['throughput']:.2f} -> {current['throughput']:.2f} ops/s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark python_interface.py against a local mock GMI server")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--reasoning-only-rate", type=float, default=0.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=400.0)
+    parser.add_argument("--stream", action="store_true", help="benchmark send_query in streaming mode")
+    parser.add_argument("--concurrency", type=lambda v: [int(x) for x in v.split(",")], default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32, help="calls per send_query/generate_topic/topic_pool scenario")
+    parser.add_argument("--rounds", type=int, default=6, help="turns per debate in the turn-loop scenario")
+    parser.add_argument("--cold-runs", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+if __name__ == "__main__":
+    main()
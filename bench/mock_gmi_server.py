@@ -0,0 +1,257 @@
+# mock_gmi_server.py
+"""Local stand-in for the GMI chat-completions endpoint
+
+Serves POST /v1/chat/completions in both plain JSON and SSE (stream=true) form,
+with configurable latency, jitter, stalled requests, error rates, 429s, broken or stalled streams, a simulated prompt
+prefix cache and R1-style responses whose answer only appears in reasoning_content. Used by benchmark.py; can also be run
+on its own and targeted with GMI_API_URL:
+
+    python mock_gmi_server.py --port 8089 --latency 0.8 --jitter 0.2 --error-rate 0.05
+    GMI_API_URL=http://127.0.0.1:8089/v1/chat/completions python ../src/python_interface.py "Elon Musk" "AI"
+"""
+import argparse
+import collections
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONFIG = {
+    "latency": 0.5,            # seconds before the first byte
+    "jitter": 0.1,             # +/- uniform jitter added to latency
+    "slow_rate": 0.0,          # fraction of requests that stall for slow_latency instead
+    "slow_latency": 5.0,       # seconds a stalled request waits before the first byte
+    "slow_model": "",          # requests for this model always stall for slow_latency
+    "error_rate": 0.0,         # fraction of requests answered with HTTP 500
+    "rate_limit_rate": 0.0,    # fraction of requests answered with HTTP 429
+    "retry_after": 1,          # Retry-After seconds sent with random 429s
+    "quota": 0,                # requests allowed per quota_window (0 = unlimited), enforced with 429s
+    "quota_window": 60.0,      # seconds of the sliding quota window
+    "reasoning_only_rate": 0.0,  # fraction of answers with empty content (answer in reasoning)
+    "reasoning_tokens": 40,    # reasoning words per response
+    "answer_tokens": 40,       # answer words per response
+    "tokens_per_sec": 200.0,   # streaming pace; 0 sends everything at once
+    "prefill_tokens_per_sec": 0.0,  # prompt processing pace for uncached prompt tokens; 0 = free
+    "prefix_cache": 1,         # 1 reports message prefixes seen before as cached prompt tokens
+    "stream_fault": "",        # halfway through the answer: "drop" cuts the stream off, "invalid" sends a bad payload,
+                               # "stall" goes silent for slow_latency seconds before carrying on
+}
+
+PREFIX_BLOCK_CHARS = 64  # prefix cache granularity (~16 tokens, a typical KV-cache block)
+
+REASONING_WORDS = "Okay, let me think about how this speaker would frame the topic and what they value most".split()
+ANSWER_WORDS = "The future rewards those who build it with patience, curiosity and a willingness to be wrong".split()
+TOPIC_SUBJECTS = ["Artificial Intelligence", "Renewable Energy", "Space Colonization", "Remote Work", "Gene Editing",
+                  "Social Media", "Universal Basic Income", "Online Education", "Nuclear Power", "Digital Privacy"]
+TOPIC_FRAMES = ["Should {} Be Regulated?", "{}: Progress or Peril?", "The Future of {}", "The Ethics of {}",
+                "{} and Economic Inequality"]
+
+def _topics(count):
+    """Debate topics for topic requests; repeats are likely, which exercises deduplication"""
+    return "\n".join(random.choice(TOPIC_FRAMES).format(random.choice(TOPIC_SUBJECTS)) for _ in range(count))
+
+def _prompt_tokens(messages):
+    return sum(len(str(m.get("content", ""))) for m in messages) // 4
+
+def _words(source, count):
+    return " ".join(source[i % len(source)] for i in range(count))
+
+class MockGMIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up on a stalled request (deadline or hedge)
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def _send_json(self, status, body, extra_headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _take_quota(self):
+        """Admit a request against the sliding-window quota; returns rate-limit headers (with Retry-After if refused)"""
+        now = time.monotonic()
+        window = self.server.quota_log
+        while window and now - window[0] >= self.config["quota_window"]:
+            window.popleft()
+        reset = self.config["quota_window"] - (now - window[0]) if window else 0.0
+        if len(window) >= self.config["quota"]:
+            self.server.quota_rejections += 1
+            return {"Retry-After": str(max(1, round(reset))), "X-RateLimit-Remaining-Requests": "0",
+                    "X-RateLimit-Reset-Requests": f"{reset:.3f}s"}
+        window.append(now)
+        return {"X-RateLimit-Remaining-Requests": str(self.config["quota"] - len(window)),
+                "X-RateLimit-Reset-Requests": f"{reset:.3f}s"}
+
+    def _cached_prompt_tokens(self, messages):
+        """Prompt tokens covered by blocks seen in earlier requests, like a server's paged prefix cache"""
+        prompt = "".join(f"<{m.get('role')}>{m.get('content', '')}" for m in messages)
+        digest, cached, seen = hashlib.sha1(), 0, self.server.prefix_hashes
+        for start in range(0, len(prompt) - PREFIX_BLOCK_CHARS + 1, PREFIX_BLOCK_CHARS):
+            digest.update(prompt[start:start + PREFIX_BLOCK_CHARS].encode('utf-8'))
+            key = digest.hexdigest()
+            if key in seen and cached == start // 4:
+                cached = (start + PREFIX_BLOCK_CHARS) // 4
+            seen.add(key)
+        return min(cached, _prompt_tokens(messages))
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        config = self.config
+        with self.server.lock:
+            self.server.request_count += 1
+            quota_headers = self._take_quota() if config["quota"] else {}
+            messages = request.get("messages", [])
+            cached_tokens = self._cached_prompt_tokens(messages) if config["prefix_cache"] else 0
+        if quota_headers.get("Retry-After"):
+            self._send_json(429, {"error": {"message": "Rate limit exceeded"}}, quota_headers)
+            return
+        if config["prefill_tokens_per_sec"] > 0:
+            time.sleep((_prompt_tokens(messages) - cached_tokens) / config["prefill_tokens_per_sec"])
+        if random.random() < config["slow_rate"] or (config["slow_model"] and request.get("model") == config["slow_model"]):
+            time.sleep(config["slow_latency"])
+        else:
+            time.sleep(max(0.0, config["latency"] + random.uniform(-config["jitter"], config["jitter"])))
+
+        roll = random.random()
+        if roll < config["rate_limit_rate"]:
+            self._send_json(429, {"error": {"message": "Rate limit exceeded"}},
+                            {"Retry-After": str(config["retry_after"]),
+                             "X-RateLimit-Remaining-Requests": "0"})
+            return
+        if roll < config["rate_limit_rate"] + config["error_rate"]:
+            self._send_json(500, {"error": {"message": "Internal server error"}})
+            return
+
+        reasoning_only = random.random() < config["reasoning_only_rate"]
+        reasoning = _words(REASONING_WORDS, config["reasoning_tokens"])
+        answer = _words(ANSWER_WORDS, config["answer_tokens"]) + "."
+        system = next((str(m.get("content", "")) for m in request.get("messages", []) if m.get("role") == "system"), "")
+        if "debate topic" in system:
+            batch = re.search(r"Generate (\d+) distinct", system)
+            answer = _topics(int(batch.group(1)) if batch else 1)
+        max_tokens = request.get("max_tokens")
+        if reasoning_only:
+            reasoning, answer = f"{reasoning}\n{answer}", ""
+        usage = {
+            "prompt_tokens": _prompt_tokens(messages),
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            "completion_tokens": config["reasoning_tokens"] + config["answer_tokens"],
+            "completion_tokens_details": {"reasoning_tokens": config["reasoning_tokens"]},
+        }
+        finish_reason = "length" if max_tokens and usage["completion_tokens"] > max_tokens else "stop"
+
+        if request.get("stream") is True:
+            self._stream(reasoning, answer, usage, finish_reason, quota_headers)
+        else:
+            message = {"role": "assistant", "content": answer, "reasoning_content": reasoning}
+            self._send_json(200, {
+                "id": "mock-completion",
+                "model": request.get("model"),
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage,
+            }, quota_headers)
+
+    def _stream(self, reasoning, answer, usage, finish_reason, extra_headers):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in extra_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        pace = 1.0 / self.config["tokens_per_sec"] if self.config["tokens_per_sec"] > 0 else 0.0
+
+        def event(delta, **extra):
+            chunk = {"id": "mock-completion", "choices": [dict({"index": 0, "delta": delta}, **extra)]}
+            self._send_chunk(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            if pace:
+                time.sleep(pace)
+
+        for word in reasoning.split(" "):
+            event({"reasoning_content": word + " "})
+        words = answer.split(" ") if answer else []
+        for index, word in enumerate(words):
+            if index == len(words) // 2 and self.config["stream_fault"] == "stall":
+                time.sleep(self.config["slow_latency"])
+            elif index == len(words) // 2 and self.config["stream_fault"]:
+                self._break_stream(self.config["stream_fault"])
+                return
+            event({"content": word + " "})
+        final = {"id": "mock-completion", "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+                 "usage": usage}
+        self._send_chunk(f"data: {json.dumps(final)}\n\n".encode('utf-8'))
+        self._send_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _break_stream(self, fault):
+        """End a stream mid-answer: with an unparseable event, or by dropping the connection"""
+        if fault == "invalid":
+            self._send_chunk(b"data: {\"choices\": [\n\n")
+            self._send_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        else:
+            self.close_connection = True  # No terminating chunk: the client sees a truncated body
+
+def start_mock_server(host="127.0.0.1", port=0, **config):
+    """Start the mock server on a background thread; returns (server, chat-completions URL)"""
+    server = ThreadingHTTPServer((host, port), MockGMIHandler)
+    server.daemon_threads = True
+    server.config = dict(DEFAULT_CONFIG, **config)
+    server.lock = threading.Lock()
+    server.request_count = 0
+    server.quota_log = collections.deque()
+    server.quota_rejections = 0
+    server.prefix_hashes = set()
+    threading.Thread(target=server.serve_forever, name="mock-gmi", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1/chat/completions"
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock GMI chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    for key, value in DEFAULT_CONFIG.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in DEFAULT_CONFIG}
+    server, url = start_mock_server(args.host, args.port, **config)
+    print(f"Mock GMI server listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# startup_profile.py
+"""Import-time profile and startup budget for the one-process-per-turn CLI
+
+Runs the fallback and cached paths of python_interface.py (the way MainWindow
+starts it, with -m) under -X importtime and checks that each stays within a
+budget over bare interpreter startup and never imports the HTTP stack:
+
+    python startup_profile.py                  # exits 1 if a path is over budget
+    python startup_profile.py --budget-ms 30 --runs 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_gmi_server import start_mock_server
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.normpath(os.path.join(BENCH_DIR, "..", "src"))
+DUMMY_API_KEY = "bench-key-0123456789"
+
+# Modules that mean the HTTP stack was loaded on a path that should not need it
+FORBIDDEN_MODULES = ("requests", "urllib3", "charset_normalizer", "idna")
+
+def parse_importtime(stderr):
+    """Return {module: cumulative microseconds} for top-level imports in -X importtime output"""
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            imports[name.strip()] = int(cumulative)
+    return imports
+
+def run_command(args, env, runs):
+    """Median wall time of `runs` fresh processes, plus the import profile of the last one"""
+    timings, stderr = [], ""
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime"] + args, env=env, cwd=SRC_DIR,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
+        timings.append(time.perf_counter() - started)
+        stderr = result.stderr
+    return sorted(timings)[len(timings) // 2], parse_importtime(stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile and startup budget for python_interface.py")
+    parser.add_argument("--runs", type=int, default=9)
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="allowed wall time over bare interpreter startup, per path")
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per path")
+    args = parser.parse_args()
+
+    # Populate the response cache once so the replay path below is a cache hit (the URL is part of the key)
+    server, url = start_mock_server(latency=0.0, jitter=0.0, tokens_per_sec=0)
+    cache_dir = tempfile.mkdtemp(prefix="bright_minds_startup_")
+    env = dict(os.environ, BRIGHT_MINDS_CACHE_DIR=cache_dir, GMI_METRICS_SINK="off", GMI_API_KEY="", GMI_API_URL=url,
+               GMI_RESPONSE_CACHE_ALLOW_SAMPLED="1")
+    subprocess.run([sys.executable, "-m", "python_interface", "Elon Musk", "AI Ethics"], cwd=SRC_DIR,
+                   env=dict(env, GMI_API_KEY=DUMMY_API_KEY, GMI_RESPONSE_CACHE="on"),
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    server.shutdown()
+
+    paths = {
+        "fallback_topic": (["-m", "python_interface", "topic_generator", ""], env),
+        "fallback_query": (["-m", "python_interface", "Elon Musk", "AI Ethics"], env),
+        "cached_query": (["-m", "python_interface", "Elon Musk", "AI Ethics"], dict(env, GMI_RESPONSE_CACHE="replay")),
+    }
+
+    baseline, baseline_imports = run_command(["-c", "pass"], env, args.runs)
+    print(f"Interpreter startup: {baseline * 1000:.1f} ms (budget: +{args.budget_ms:.0f} ms per path)\n")
+
+    failures = []
+    for name, (command, path_env) in paths.items():
+        wall, imports = run_command(command, path_env, args.runs)
+        overhead = (wall - baseline) * 1000
+        ours = {module: us for module, us in imports.items() if module not in baseline_imports}
+        forbidden = sorted(module for module in ours if module.split(".")[0] in FORBIDDEN_MODULES)
+        status = "ok" if overhead <= args.budget_ms and not forbidden else "OVER BUDGET"
+        print(f"{name:<16} {wall * 1000:7.1f} ms  (+{overhead:5.1f} ms)  {status}")
+        for module, us in sorted(ours.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {us / 1000:6.1f} ms  {module}")
+        if forbidden:
+            print(f"    imported {', '.join(forbidden)}")
+        if status != "ok":
+            failures.append(name)
+
+    if failures:
+        print(f"\nOver budget: {', '.join(failures)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
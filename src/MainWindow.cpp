@@ -13,6 +13,7 @@
 #include <QTextStream>
 #include <QMessageBox>
 #include <QDateTime>
+#include <QRegularExpression>
 
 MainWindow::MainWindow(QWidget *parent)
     : QMainWindow(parent)
@@ -20,6 +21,7 @@ MainWindow::MainWindow(QWidget *parent)
     , debateTimer(new QTimer(this))
     , pythonProcess(new QProcess(this))
     , topicProcess(new QProcess(this))
+    , sessionProcess(new QProcess(this))
     , debateActive(false)
     , currentSpeaker(0)
     , debateRound(0)
@@ -39,6 +41,14 @@ MainWindow::MainWindow(QWidget *parent)
             this, &MainWindow::onPythonProcessFinished);
     connect(topicProcess, QOverload<int, QProcess::ExitStatus>::of(&QProcess::finished),
             this, &MainWindow::onTopicGenerationFinished);
+    connect(sessionProcess, QOverload<int, QProcess::ExitStatus>::of(&QProcess::finished),
+            this, &MainWindow::onSessionCreated);
+    connect(sessionProcess, &QProcess::errorOccurred, this, [this](QProcess::ProcessError error) {
+        if (error == QProcess::FailedToStart) {
+            ui->startButton->setEnabled(true);
+            logToAudience("Error: Could not start Python to create a debate session", "red");
+        }
+    });
     
     // Initialize speakers
     initializeSpeakers();
@@ -163,9 +173,36 @@ void MainWindow::onStartDebateClicked()
 
 void MainWindow::startDebate()
 {
+    if (sessionProcess->state() != QProcess::NotRunning) {
+        return;  // A session is already being created
+    }
+
+    // Create the debate session without blocking the UI; the debate starts in onSessionCreated
+    ui->startButton->setEnabled(false);
+    sessionProcess->start("python", QStringList() << "-m" << "python_interface"
+                                                  << "--session-new" << currentTopic << speaker1Name << speaker2Name);
+}
+
+void MainWindow::onSessionCreated(int exitCode, QProcess::ExitStatus exitStatus)
+{
+    ui->startButton->setEnabled(true);
+
+    // --session-new prints only the new session's id (16 hex digits)
+    static const QRegularExpression sessionIdPattern("^[0-9a-f]{16}$");
+    QString output = QString::fromUtf8(sessionProcess->readAllStandardOutput()).trimmed();
+    if (exitStatus != QProcess::NormalExit || exitCode != 0 || !sessionIdPattern.match(output).hasMatch()) {
+        logToAudience("Error: Could not create a debate session", "red");
+        QString errorOutput = sessionProcess->readAllStandardError();
+        if (!errorOutput.isEmpty()) {
+            logToAudience(QString("Python error: %1").arg(errorOutput), "red");
+        }
+        sessionId.clear();
+        return;
+    }
+    sessionId = output;
+
     // Clear previous content
     ui->unifiedChat->clear();
-    debateHistory.clear();
     
     // Update UI
     debateActive = true;
@@ -199,17 +236,11 @@ void MainWindow::continueDebate()
     
     QString currentSpeakerName = (currentSpeaker == 0) ? speaker1Name : speaker2Name;
     
-    // Build context from debate history
-    QString context = debateHistory.join("\n");
-    
-    // Prepare Python process arguments
+    // Prepare Python process arguments; the topic and history come from the session store
     QStringList arguments;
-    arguments << "python_interface.py" 
-             << currentSpeakerName 
-             << currentTopic 
-             << context 
-             << ""  // No user question
-             << "true";  // Is debate continuation
+    arguments << "-m" << "python_interface"  // -m runs from cached bytecode instead of recompiling the script
+             << "--session" << sessionId
+             << currentSpeakerName;
     
     // Start Python process
     pythonProcess->start("python", arguments);
@@ -250,8 +281,6 @@ void MainWindow::onPythonProcessFinished(int exitCode, QProcess::ExitStatus exit
         !output.trimmed().isEmpty() &&
         !output.contains("Using fallback response")) {
         sendSpeakerMessage(currentSpeakerName, output);
-        // Add to debate history
-        debateHistory.append(QString("%1: %2").arg(currentSpeakerName, output));
     } else if (output.contains("Using fallback response")) {
         // Extract the fallback response and log the API failure
         QStringList lines = output.split('\n');
@@ -276,7 +305,6 @@ void MainWindow::onPythonProcessFinished(int exitCode, QProcess::ExitStatus exit
                 !line.trimmed().isEmpty() &&
                 line.trimmed() != "None") {
                 sendSpeakerMessage(currentSpeakerName, line.trimmed());
-                debateHistory.append(QString("%1: %2").arg(currentSpeakerName, line.trimmed()));
                 break;
             }
         }
@@ -341,7 +369,7 @@ void MainWindow::generateInitialTopic()
     
     // Prepare Python process arguments for topic generation
     QStringList arguments;
-    arguments << "python_interface.py" 
+    arguments << "-m" << "python_interface"
              << "topic_generator" 
              << ""  // No topic needed for generation
              << ""  // No context
@@ -365,41 +393,63 @@ void MainWindow::onSendClicked()
     // Log user question
     logToAudience(QString("❓ Audience Question: %1").arg(userQuestion), "orange");
     
-    // Build context from debate history
-    QString context = debateHistory.join("\n");
-    
-    // Send question to both speakers
-    QStringList speakers = {speaker1Name, speaker2Name};
-    for (const QString& speaker : speakers) {
-        // Prepare Python process arguments for user question
-        QStringList arguments;
-        arguments << "python_interface.py" 
-                 << speaker 
-                 << currentTopic 
-                 << context 
-                 << userQuestion 
-                 << "false";  // Not debate continuation
-        
-        // Create a new process for each speaker
-        QProcess* process = new QProcess(this);
-        connect(process, QOverload<int, QProcess::ExitStatus>::of(&QProcess::finished),
-                [this, process, speaker](int exitCode, QProcess::ExitStatus exitStatus) {
-            if (exitCode == 0) {
-                QString output = process->readAllStandardOutput().trimmed();
-                if (!output.isEmpty()) {
-                    sendSpeakerMessage(speaker, output);
-                }
+    // Ask both speakers from one process; it prints one JSON result line per speaker as each answer arrives
+    QStringList arguments;
+    arguments << "-m" << "python_interface"
+             << "--ask" << "--session" << sessionId
+             << userQuestion
+             << speaker1Name << speaker2Name;
+
+    QProcess* process = new QProcess(this);
+    connect(process, &QProcess::readyReadStandardOutput, this, [this, process]() {
+        while (process->canReadLine()) {
+            QJsonDocument result = QJsonDocument::fromJson(process->readLine().trimmed());
+            if (result.isObject()) {
+                showAudienceAnswer(result.object());
             }
-            process->deleteLater();
-        });
-        
-        process->start("python", arguments);
-    }
+        }
+    });
+    connect(process, QOverload<int, QProcess::ExitStatus>::of(&QProcess::finished),
+            [this, process](int exitCode, QProcess::ExitStatus exitStatus) {
+        if (exitStatus != QProcess::NormalExit || exitCode != 0) {
+            logToAudience("Error: Could not ask the speakers", "red");
+            QString errorOutput = process->readAllStandardError();
+            if (!errorOutput.isEmpty()) {
+                logToAudience(QString("Python error: %1").arg(errorOutput), "red");
+            }
+        }
+        process->deleteLater();
+    });
+
+    process->start("python", arguments);
     
     // Clear input
     ui->questionInput->clear();
 }
 
+void MainWindow::showAudienceAnswer(const QJsonObject& result)
+{
+    QString speaker = result.value("speaker").toString();
+    QString output = result.value("output").toString().trimmed();
+
+    if (result.contains("error")) {
+        logToAudience(QString("Error: No answer from %1 (%2)").arg(speaker, result.value("error").toString()), "red");
+        return;
+    }
+
+    if (result.value("fallback").toBool()) {
+        // API_FAILED:<reason>, the "Using fallback" notice, then the fallback answer
+        QStringList lines = output.split('\n');
+        QString failureReason = lines.first().split(":").last().trimmed();
+        logToAudience(QString("⚠️ API failed for %1 (%2) - using fallback response").arg(speaker, failureReason), "orange");
+        output = lines.size() > 2 ? lines.last().trimmed() : QString();
+    }
+
+    if (!output.isEmpty()) {
+        sendSpeakerMessage(speaker, output);
+    }
+}
+
 void MainWindow::onQuestionInputReturnPressed()
 {
     onSendClicked();
@@ -499,7 +549,7 @@ void MainWindow::onGenerateTopicClicked()
     
     // Prepare Python process arguments for topic generation
     QStringList arguments;
-    arguments << "python_interface.py" 
+    arguments << "-m" << "python_interface"
              << "topic_generator" 
              << "debate_topic" 
              << "" 
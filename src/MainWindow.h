@@ -4,6 +4,7 @@
 #include <QTimer>
 #include <QProcess>
 #include <QStringList>
+#include <QJsonObject>
 
 QT_BEGIN_NAMESPACE
 namespace Ui { class MainWindow; }
@@ -23,6 +24,7 @@ private slots:
     void onDebateTimerTimeout();
     void onPythonProcessFinished(int exitCode, QProcess::ExitStatus exitStatus);
     void onPythonProcessError();
+    void onSessionCreated(int exitCode, QProcess::ExitStatus exitStatus);
     void onGenerateTopicClicked();
     void generateInitialTopic();
     void onTopicGenerationFinished(int exitCode, QProcess::ExitStatus exitStatus);
@@ -33,6 +35,7 @@ private:
     void startDebate();
     void continueDebate();
     void sendSpeakerMessage(const QString& speaker, const QString& message);
+    void showAudienceAnswer(const QJsonObject& result);
     void logToAudience(const QString& message, const QString& color = "black");
     QString getSpeakerPrompt(const QString& speaker, const QString& context, const QString& topic, bool isUserQuestion = false);
     
@@ -40,6 +43,7 @@ private:
     QTimer *debateTimer;
     QProcess *pythonProcess;
     QProcess *topicProcess;
+    QProcess *sessionProcess;
     
     // Debate state
     bool debateActive;
@@ -48,7 +52,7 @@ private:
     QString speaker1Name;
     QString speaker2Name;
     QString currentTopic;
-    QStringList debateHistory;
+    QString sessionId;  // Debate session in the Python-side session store
     
     // Speaker configurations
     struct SpeakerConfig {
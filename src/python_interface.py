@@ -1,88 +1,2091 @@
 # python_interface.py
 import os
 import sys
-import requests
 import json
-from dotenv import load_dotenv
+import re
+import time
+import hashlib
+import threading
 
-# Set UTF-8 encoding for stdout to handle Unicode characters
-import codecs
-sys.stdout = codecs.getwriter('utf-8')(sys.stdout.detach())
+# Imports that cost tens of milliseconds (requests, dotenv, sqlite3, concurrent.futures)
+# are deferred to the functions that need them: in the one-process-per-turn model the
+# fallback and cached paths should not pay for an HTTP stack they never use.
 
-# Load environment variables from .env file
-load_dotenv()
+def find_env_file():
+    """Return the nearest .env walking up from this script's directory, or None"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(directory, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+# Load environment variables from .env file (python-dotenv is only imported if there is one)
+_env_file = find_env_file()
+if _env_file:
+    from dotenv import load_dotenv
+    load_dotenv(_env_file)
 API_KEY = os.getenv("GMI_API_KEY")
+API_URL = os.getenv("GMI_API_URL", "https://api.gmi-serving.com/v1/chat/completions")
+
+# Leveled stderr logging: per-request dumps are only written at debug level
+LOG_LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+LOG_LEVEL = LOG_LEVELS.get(os.getenv("GMI_LOG_LEVEL", "info").lower(), LOG_LEVELS["info"])
+
+def log_debug(message):
+    """Write a message to stderr only when GMI_LOG_LEVEL=debug"""
+    if LOG_LEVEL <= LOG_LEVELS["debug"]:
+        print(message, file=sys.stderr)
+
+def log_info(message):
+    """Write an operational message (breaker, rate limit, failover, batch progress) unless GMI_LOG_LEVEL is above info"""
+    if LOG_LEVEL <= LOG_LEVELS["info"]:
+        print(message, file=sys.stderr)
+
+def configure_stdout():
+    """Set UTF-8 encoding for stdout to handle Unicode characters"""
+    sys.stdout.reconfigure(encoding='utf-8')
+
+def log_api_key_status():
+    """Debug: Print API key status (to stderr to avoid polluting output)"""
+    if API_KEY:
+        log_debug(f"Debug: API key loaded successfully (length: {len(API_KEY)})")
+    else:
+        log_debug("Debug: No API key found in environment variables")
+        log_debug(f"Debug: Available env vars: {[k for k in os.environ.keys() if 'API' in k or 'GMI' in k]}")
+
+def _requests():
+    """Import requests on first network use; the exception clauses below go through this too"""
+    import requests
+    return requests
+
+def _probe_api():
+    """Send a tiny completion and return (healthy, breaker_failure, detail)"""
+    if not API_KEY:
+        return False, False, "No API key available"
+    requests = _requests()
+    
+    url = API_URL
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {API_KEY}"
+    }
+    
+    payload = {
+        "model": get_model_route("health")[0]["model"],
+        "messages": [{"role": "user", "content": "Hello"}],
+        "max_tokens": 10
+    }
+    
+    try:
+        response = get_http_session().post(url, headers=headers, json=payload, timeout=10)
+        if response.status_code == 200:
+            return True, False, "API connection successful"
+        else:
+            return False, is_breaker_failure_status(response.status_code), f"API returned status {response.status_code}: {response.text[:200]}"
+    except requests.exceptions.Timeout:
+        return False, True, "API timeout"
+    except requests.exceptions.ConnectionError:
+        return False, True, "API connection error"
+    except Exception as e:
+        return False, False, f"API test error: {str(e)}"
+
+def test_api_connection():
+    """Test the API connection and return detailed error information"""
+    return _probe_api()[2]
+
+# Shared HTTP session so keep-alive connections are reused across calls
+_http_session = None
+
+# Connect time of the last new connection opened on this thread (0.0 if reused)
+_connection_timing = threading.local()
+
+def make_timed_adapter(**kwargs):
+    """Return an HTTPAdapter whose connections record their connect time in _connection_timing"""
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    def timed(connection_cls):
+        class TimedConnection(connection_cls):
+            def connect(self):
+                started = time.perf_counter()
+                try:
+                    super().connect()
+                finally:
+                    _connection_timing.connect = time.perf_counter() - started
+        return TimedConnection
+
+    class TimedHTTPPool(HTTPConnectionPool):
+        ConnectionCls = timed(HTTPConnection)
+
+    class TimedHTTPSPool(HTTPSConnectionPool):
+        ConnectionCls = timed(HTTPSConnection)
+
+    from requests.adapters import HTTPAdapter
+
+    class TimedAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **pool_kwargs):
+            super().init_poolmanager(*args, **pool_kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPPool, "https": TimedHTTPSPool}
+
+    return TimedAdapter(**kwargs)
+
+def get_http_session():
+    """Return the process-wide requests.Session, creating it on first use"""
+    global _http_session
+    if _http_session is None:
+        _http_session = _requests().Session()
+        adapter = make_timed_adapter(pool_connections=4, pool_maxsize=16)
+        _http_session.mount("https://", adapter)
+        _http_session.mount("http://", adapter)
+    return _http_session
+
+# On-disk state shared by every python_interface.py process on this machine
+CACHE_DIR = os.getenv("BRIGHT_MINDS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bright_minds"))
+
+def get_cache_path(name):
+    """Return the path of a file in the shared cache directory, creating the directory if needed"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, name)
+
+def read_json_file(path, default=None):
+    """Read a JSON file, returning default if it is missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def write_json_file(path, data):
+    """Atomically replace a JSON file so concurrent readers never see a partial write"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+class FileLock:
+    """Exclusive advisory lock on a file, held across processes and threads for a with block"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+')
+        if os.name == "nt":
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if os.name == "nt":
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+# Structured per-request metrics: "file" (metrics.jsonl in the cache directory),
+# "stderr", "off", or a path to a JSON-lines file
+METRICS_SINK = os.getenv("GMI_METRICS_SINK", "file")
+METRICS_SAMPLE_RATE = float(os.getenv("GMI_METRICS_SAMPLE_RATE", "1.0"))
+METRICS_MAX_BYTES = 10 * 1024 * 1024
+
+_metrics_lock = threading.Lock()
+
+def metrics_path():
+    """Return the JSON-lines file metrics are written to, or None for stderr/off"""
+    if METRICS_SINK in ("stderr", "off"):
+        return None
+    return get_cache_path("metrics.jsonl") if METRICS_SINK == "file" else METRICS_SINK
+
+def emit_metrics_event(event):
+    """Write one metrics event to the configured sink
+
+    Routine info-level events are sampled at METRICS_SAMPLE_RATE; warnings
+    (fallbacks, failed requests) are always kept.
+    """
+    if METRICS_SINK == "off":
+        return
+    if event.get("level") == "info" and METRICS_SAMPLE_RATE < 1.0:
+        import random
+        if random.random() >= METRICS_SAMPLE_RATE:
+            return
+    line = json.dumps(event, ensure_ascii=False) + "\n"
+    if METRICS_SINK == "stderr":
+        sys.stderr.write("METRICS:" + line)
+        return
+    path = metrics_path()
+    try:
+        with _metrics_lock:
+            if os.path.exists(path) and os.path.getsize(path) > METRICS_MAX_BYTES:
+                os.replace(path, path + ".1")
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line)
+    except OSError as e:
+        log_info(f"Debug: Could not write metrics event: {str(e)}")
+
+class RequestMetrics:
+    """Timing, token and outcome accounting for one send_query/generate_topic call
+
+    Times are seconds since the call started: connect (TCP/TLS setup, 0 on a
+    reused connection), ttfb (response headers), first_token (first streamed
+    answer delta) and total. Token counts come from the response's usage block,
+    with reasoning tokens estimated from the text when the server omits them and
+    cached_prompt_tokens set when the server reports prefix-cache hits.
+    """
+
+    def __init__(self, kind, mode, speaker=None):
+        self.started = time.perf_counter()
+        self.fields = {"ts": round(time.time(), 3), "kind": kind, "mode": mode, "speaker": speaker,
+                       "cache": "off", "fallback": None}
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def mark_once(self, name):
+        if name not in self.fields:
+            self.fields[name] = round(time.perf_counter() - self.started, 4)
+
+    def set_cache_status(self, cache, cache_key, cached):
+        if cache_key:
+            self.fields["cache"] = "hit" if cached is not None else "miss"
+        elif cache.enabled:
+            self.fields["cache"] = "bypass"
+
+    def watch(self, emit):
+        """Wrap an emit callback so API_FAILED:<reason> lines are recorded as the fallback reason"""
+        def watched(line):
+            if isinstance(line, str) and line.startswith("API_FAILED:") and not self.fields["fallback"]:
+                self.fields["fallback"] = line.split(":", 1)[1]
+            emit(line)
+        return watched
+
+    def record_response(self, resp_json):
+        usage = resp_json.get("usage") or {}
+        details = usage.get("completion_tokens_details") or {}
+        message = ((resp_json.get("choices") or [{}])[0].get("message") or {})
+        reasoning_tokens = details.get("reasoning_tokens")
+        # OpenAI-style servers report prefix-cache hits under prompt_tokens_details, DeepSeek-style at the top level
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+        if cached_tokens is None:
+            cached_tokens = usage.get("prompt_cache_hit_tokens")
+        if reasoning_tokens is None and message.get("reasoning_content"):
+            reasoning_tokens = estimate_tokens(message["reasoning_content"])
+        self.fields.update({
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "cached_prompt_tokens": cached_tokens,
+            "reasoning_tokens": reasoning_tokens,
+            "finish_reason": (resp_json.get("choices") or [{}])[0].get("finish_reason"),
+        })
+
+    def finish(self):
+        total = time.perf_counter() - self.started
+        self.fields["total"] = round(total, 4)
+        completion_tokens = self.fields.get("completion_tokens")
+        if completion_tokens and total > 0 and self.fields["cache"] != "hit":
+            self.fields["tokens_per_sec"] = round(completion_tokens / total, 2)
+        self.fields["level"] = "warning" if self.fields["fallback"] else "info"
+        emit_metrics_event(self.fields)
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, int(-(-pct * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def read_metrics_events(path=None):
+    """Return every event in the metrics file, or None if there is no file"""
+    path = path or metrics_path()
+    if not path or not os.path.exists(path):
+        return None
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return events
+
+def truncation_rate(events):
+    """Share of events with a completion whose finish_reason shows it ran out of budget"""
+    finished = [e for e in events if e.get("finish_reason")]
+    return sum(1 for e in finished if e["finish_reason"] in BUDGET_FINISH_REASONS) / len(finished) if finished else 0.0
+
+def budget_stats(path=None):
+    """Return per-mode and per-speaker completion and budget-truncation counts from the metrics file"""
+    stats = {"modes": {}, "speakers": {}}
+    for event in read_metrics_events(path) or []:
+        if not event.get("finish_reason"):
+            continue
+        truncated = event["finish_reason"] in BUDGET_FINISH_REASONS
+        for group, name in (("modes", event.get("mode")), ("speakers", event.get("speaker"))):
+            if name:
+                entry = stats[group].setdefault(name, {"requests": 0, "truncated": 0})
+                entry["requests"] += 1
+                entry["truncated"] += truncated
+    for group in stats.values():
+        for entry in group.values():
+            entry["truncation_rate"] = round(entry["truncated"] / entry["requests"], 3)
+    return stats
+
+def summarize_metrics(path=None):
+    """Print latency percentiles, fallback, truncation and cache-hit rates per mode, speaker and model"""
+    path = path or metrics_path()
+    events = read_metrics_events(path)
+    if events is None:
+        print(f"No metrics found at {path}")
+        return
+
+    for group_by in ("mode", "speaker", "model"):
+        groups = {}
+        for event in events:
+            if event.get(group_by):
+                groups.setdefault(event[group_by], []).append(event)
+        print(f"{group_by:<20} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'ttfb p50':>9} {'tok/s':>7} {'fallback':>9} "
+              f"{'truncated':>10} {'cache hit':>10}")
+        for name, group in sorted(groups.items()):
+            totals = [e["total"] for e in group if "total" in e]
+            ttfbs = [e["ttfb"] for e in group if e.get("ttfb") is not None]
+            rates = [e["tokens_per_sec"] for e in group if e.get("tokens_per_sec")]
+            fallback_rate = sum(1 for e in group if e.get("fallback")) / len(group)
+            hit_rate = sum(1 for e in group if e.get("cache") == "hit") / len(group)
+            label = name.split("/")[-1] if group_by == "model" else name
+            print(f"{label[:20]:<20} {len(group):>6} "
+                  f"{percentile(totals, 50):>8.2f} {percentile(totals, 95):>8.2f} {percentile(totals, 99):>8.2f} "
+                  f"{(percentile(ttfbs, 50) if ttfbs else 0):>9.2f} {(sum(rates) / len(rates) if rates else 0):>7.1f} "
+                  f"{fallback_rate:>9.0%} {truncation_rate(group):>10.0%} {hit_rate:>10.0%}")
+        print()
+
+    # How often the tail-latency policy paid off: a hedge that answered first, a retry that avoided a fallback
+    hedged = [e for e in events if e.get("hedged")]
+    retried = [e for e in events if e.get("retries")]
+    print(f"Hedged requests: {len(hedged)}, answered by the hedge: {sum(1 for e in hedged if e.get('hedge_won'))}")
+    print(f"Retried requests: {len(retried)}, recovered without fallback: {sum(1 for e in retried if not e.get('fallback'))}")
+    failed_over = [e for e in events if e.get("failovers")]
+    if failed_over:
+        print(f"Model failovers: {len(failed_over)}, answered by an alternate model: "
+              f"{sum(1 for e in failed_over if not e.get('fallback'))}")
+    reported = [e for e in events if e.get("cached_prompt_tokens") is not None and e.get("cache") != "hit"]
+    if reported:
+        prompt_tokens = sum(e.get("prompt_tokens") or 0 for e in reported)
+        cached_tokens = sum(e["cached_prompt_tokens"] for e in reported)
+        print(f"Prompt cache: {cached_tokens} of {prompt_tokens} prompt tokens served from the server's prefix cache "
+              f"({cached_tokens / prompt_tokens if prompt_tokens else 0:.0%} over {len(reported)} requests)")
+    waited = [e["rate_wait"] for e in events if e.get("rate_wait")]
+    if waited:
+        print(f"Rate limiter: {len(waited)} requests queued, wait p50 {percentile(waited, 50):.2f}s p95 {percentile(waited, 95):.2f}s")
+
+# Health probe cache and circuit breaker settings
+HEALTH_TTL = float(os.getenv("GMI_HEALTH_TTL", "300"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("GMI_BREAKER_FAILURE_THRESHOLD", "3"))
+BREAKER_COOLDOWN = float(os.getenv("GMI_BREAKER_COOLDOWN", "60"))
+
+def is_breaker_failure_status(status_code):
+    """Return True for HTTP statuses that indicate the upstream is unavailable
+
+    429 is not one of them: the upstream is up and the rate limiter already
+    holds every caller back until the quota recovers.
+    """
+    return status_code >= 500
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker whose state lives in a shared JSON file
+
+    The breaker opens after BREAKER_FAILURE_THRESHOLD consecutive upstream failures,
+    rejects calls for BREAKER_COOLDOWN seconds, then lets a single trial request
+    through (half-open). The trial's outcome closes or re-opens it. The same file
+    caches the latest health probe result so other processes can reuse it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, path, failure_threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+    def _load(self):
+        state = read_json_file(self.path, {})
+        if not isinstance(state, dict):
+            state = {}
+        state.setdefault("state", self.CLOSED)
+        state.setdefault("failures", 0)
+        return state
+
+    def _update(self, change, default=None):
+        """Run change(state, now) on the shared state under the file lock and save it
+
+        Returns change's result, or default if the state could not be persisted.
+        """
+        try:
+            with FileLock(self.lock_path):
+                state = self._load()
+                result = change(state, time.time())
+                write_json_file(self.path, state)
+            return result
+        except OSError as e:
+            log_info(f"Debug: Could not persist circuit breaker state: {str(e)}")
+            return default
+
+    def state(self):
+        """Return the current state, moving open to half-open once the cooldown has elapsed"""
+        state = self._load()
+        if state["state"] == self.OPEN and time.time() - state.get("opened_at", 0) >= self.cooldown:
+            return self.HALF_OPEN
+        return state["state"]
+
+    def _rejects(self, state, now):
+        """Return True while the breaker is open or another process holds the half-open trial"""
+        if state["state"] == self.OPEN:
+            return now - state.get("opened_at", 0) < self.cooldown
+        return state["state"] == self.HALF_OPEN and now - state.get("trial_started_at", 0) < self.cooldown
+
+    def allow_request(self):
+        """Return True if a request may be sent upstream right now"""
+        state = self._load()
+        if state["state"] == self.CLOSED:
+            return True
+        if self._rejects(state, time.time()):
+            return False
+
+        def claim_trial(state, now):
+            # Re-check under the lock: only one trial request at a time across processes
+            if state["state"] == self.CLOSED:
+                return True
+            if self._rejects(state, now):
+                return False
+            state["state"] = self.HALF_OPEN
+            state["trial_started_at"] = now
+            return True
+
+        return self._update(claim_trial, default=True)
+
+    def record_success(self, detail="API connection successful"):
+        state = self._load()
+        probe = state.get("last_probe") or {}
+        if (state["state"] == self.CLOSED and not state["failures"] and probe.get("healthy")
+                and time.time() - probe.get("checked_at", 0) < HEALTH_TTL / 2):
+            return  # Nothing changed and the cached probe is still fresh; skip the lock and the write
+
+        def close(state, now):
+            state.update({"state": self.CLOSED, "failures": 0})
+            state.pop("opened_at", None)
+            state.pop("trial_started_at", None)
+            state["last_probe"] = {"checked_at": now, "healthy": True, "detail": detail}
+
+        self._update(close)
+
+    def record_failure(self, detail):
+        def count_failure(state, now):
+            state["failures"] = state.get("failures", 0) + 1
+            if state["state"] == self.HALF_OPEN or state["failures"] >= self.failure_threshold:
+                if state["state"] != self.OPEN:
+                    log_info(f"Debug: Circuit breaker opened after {state['failures']} failure(s): {detail}")
+                state["state"] = self.OPEN
+                state["opened_at"] = now
+                state.pop("trial_started_at", None)
+            state["last_probe"] = {"checked_at": now, "healthy": False, "detail": detail}
+
+        self._update(count_failure)
+
+    def cached_probe(self, ttl=HEALTH_TTL):
+        """Return the last probe result if it is younger than ttl seconds, else None"""
+        probe = self._load().get("last_probe")
+        if probe and time.time() - probe.get("checked_at", 0) < ttl:
+            return probe
+        return None
+
+_circuit_breaker = None
+
+def get_circuit_breaker():
+    """Return the process-wide circuit breaker backed by the shared health file"""
+    global _circuit_breaker
+    if _circuit_breaker is None:
+        _circuit_breaker = CircuitBreaker(get_cache_path("health.json"))
+    return _circuit_breaker
+
+def check_api_health(force=False):
+    """Return a health dict, reusing a cached probe result unless it is stale or force is set"""
+    breaker = get_circuit_breaker()
+    if not force:
+        cached = breaker.cached_probe()
+        if cached:
+            return dict(cached, state=breaker.state(), cached=True)
+
+    healthy, breaker_failure, detail = _probe_api()
+    if healthy:
+        breaker.record_success(detail)
+    elif breaker_failure:
+        breaker.record_failure(detail)
+    return {"checked_at": time.time(), "healthy": healthy, "detail": detail, "state": breaker.state(), "cached": False}
+
+# Optional on-disk response cache: off | on | replay (read-only, never calls the API)
+RESPONSE_CACHE_MODE = os.getenv("GMI_RESPONSE_CACHE", "off").lower()
+RESPONSE_CACHE_TTL = float(os.getenv("GMI_RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("GMI_RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_ALLOW_SAMPLED = os.getenv("GMI_RESPONSE_CACHE_ALLOW_SAMPLED", "").lower() in ("1", "true", "yes")
+
+class ResponseCache:
+    """Content-addressed cache of chat-completion responses in a SQLite file
+
+    Entries are keyed by a hash of the full request payload, expire after `ttl`
+    seconds and are evicted least-recently-used once the stored bytes exceed
+    `max_bytes`. Sampled requests (temperature > 0) bypass the cache unless
+    `allow_sampled` is set or the cache is in replay mode. Hit/miss counters are
+    kept in the same database so they aggregate across processes.
+    """
+
+    def __init__(self, path, mode=RESPONSE_CACHE_MODE, ttl=RESPONSE_CACHE_TTL,
+                 max_bytes=RESPONSE_CACHE_MAX_BYTES, allow_sampled=RESPONSE_CACHE_ALLOW_SAMPLED):
+        self.path = path
+        self.mode = mode if mode in ("off", "on", "replay") else "off"
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.allow_sampled = allow_sampled or self.mode == "replay"
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    @property
+    def offline(self):
+        return self.mode == "replay"
+
+    def _db(self):
+        if self._conn is None:
+            import sqlite3
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                               "size INTEGER NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        return self._conn
+
+    def _bump(self, name):
+        self._db().execute("INSERT INTO counters (name, value) VALUES (?, 1) "
+                           "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def key_for(self, payload):
+        """Return the cache key for payload, or None if the request must not be cached"""
+        if not self.enabled:
+            return None
+        if payload.get("temperature", 0) > 0 and not self.allow_sampled:
+            with self._lock:
+                self._bump("bypassed")
+            return None
+        material = {k: v for k, v in payload.items() if k != "stream"}
+        material["url"] = API_URL
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached response dict for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._bump("expired")
+                self._bump("misses")
+                return None
+            db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._bump("hits")
+        return json.loads(row[0])
+
+    def put(self, key, resp_json):
+        """Store a successful response and evict least-recently-used entries over the size bound"""
+        if not resp_json.get("choices"):
+            return
+        value = json.dumps(resp_json)
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                       (key, value, len(value), now, now))
+            self._bump("stores")
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = db.execute("SELECT key, size FROM entries ORDER BY accessed_at LIMIT 32").fetchall()
+                if not oldest:
+                    break
+                for old_key, size in oldest:
+                    if total <= self.max_bytes:
+                        break
+                    db.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                    self._bump("evictions")
+                    total -= size
+
+    def stats(self):
+        """Return counters plus current entry count and size"""
+        if self.path is None:
+            # Cache off: there is no database to read (or create)
+            return {"mode": self.mode, "entries": 0, "bytes": 0, "hit_rate": 0.0}
+        with self._lock:
+            db = self._db()
+            stats = dict(db.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        stats.update({"mode": self.mode, "entries": entries, "bytes": size})
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        stats["hit_rate"] = round(stats.get("hits", 0) / lookups, 3) if lookups else 0.0
+        return stats
+
+_response_cache = None
+
+def get_response_cache():
+    """Return the process-wide response cache"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(get_cache_path("responses.sqlite3") if RESPONSE_CACHE_MODE != "off" else None)
+    return _response_cache
+
+# Candidate locations for speakers.json, searched once per process
+SPEAKERS_FILE = os.getenv("BRIGHT_MINDS_SPEAKERS_FILE")
+SPEAKER_RELOAD_CHECK_INTERVAL = 1.0
+
+def data_file_paths(filename, override=None):
+    """Return the locations searched for a data file shipped next to the script, in order"""
+    possible_paths = [
+        filename,  # Current directory
+        os.path.join('..', filename),  # Parent directory
+        os.path.join('..', '..', filename),  # Grandparent directory
+        os.path.join(os.path.dirname(__file__), filename),  # Same directory as script
+        os.path.join(os.path.dirname(__file__), '..', filename),  # Parent of script directory
+    ]
+    if override:
+        possible_paths.insert(0, override)
+    return possible_paths
+
+def find_data_file(filename, override=None):
+    """Return the absolute path of the first existing data file location, or None"""
+    for path in data_file_paths(filename, override):
+        if os.path.isfile(path):
+            return os.path.abspath(path)
+    return None
+
+def find_speakers_file():
+    """Return the first existing speakers.json path, or None"""
+    path = find_data_file('speakers.json', SPEAKERS_FILE)
+    if path is None:
+        print("Error: speakers.json not found in any of the expected locations", file=sys.stderr)
+        print("Searched paths:", data_file_paths('speakers.json', SPEAKERS_FILE), file=sys.stderr)
+    return path
+
+def validate_speaker(entry):
+    """Return a list of schema problems for one speakers.json entry"""
+    if not isinstance(entry, dict):
+        return ["entry is not an object"]
+    problems = []
+    if not isinstance(entry.get("name"), str) or not entry["name"].strip():
+        problems.append("missing or empty 'name'")
+    if not isinstance(entry.get("prompt_template"), str) or not entry["prompt_template"].strip():
+        problems.append("missing or empty 'prompt_template'")
+    temperature = entry.get("temperature", 0.7)
+    if isinstance(temperature, bool) or not isinstance(temperature, (int, float)) or not 0 <= temperature <= 2:
+        problems.append("'temperature' must be a number between 0 and 2")
+    if "traits" in entry and not isinstance(entry["traits"], list):
+        problems.append("'traits' must be a list")
+    problems.extend(validate_budgets(entry.get("budgets", {})))
+    problems.extend(validate_routes(entry.get("routes", {})))
+    return problems
+
+def validate_budgets(budgets):
+    """Return a list of problems with a {"<mode>": {"max_tokens": n, ...}} budget mapping"""
+    if not isinstance(budgets, dict):
+        return ["'budgets' must be an object"]
+    problems = []
+    for mode, budget in budgets.items():
+        if mode not in REQUEST_MODES:
+            problems.append(f"unknown budget mode '{mode}'")
+        elif not isinstance(budget, dict) or not all(
+                key in ("max_tokens", "max_reasoning_tokens") and isinstance(value, int) and value > 0
+                for key, value in budget.items()):
+            problems.append(f"budget '{mode}' must map max_tokens/max_reasoning_tokens to positive integers")
+    return problems
+
+def validate_routes(routes):
+    """Return a list of problems with a {"<mode>": [{"model": name, "slo": seconds}, ...]} route mapping"""
+    if not isinstance(routes, dict):
+        return ["'routes' must be an object"]
+
+    def valid_entry(entry):
+        if not isinstance(entry, dict) or set(entry) - {"model", "slo"}:
+            return False
+        slo = entry.get("slo", 1)
+        return (isinstance(entry.get("model"), str) and bool(entry["model"].strip())
+                and isinstance(slo, (int, float)) and not isinstance(slo, bool) and slo > 0)
+
+    problems = []
+    for mode, route in routes.items():
+        if mode not in ROUTE_MODES:
+            problems.append(f"unknown route mode '{mode}'")
+        elif not isinstance(route, list) or not route or not all(valid_entry(entry) for entry in route):
+            problems.append(f"route '{mode}' must be a non-empty list of {{\"model\": name, \"slo\": seconds}} entries")
+    return problems
+
+class SpeakerRegistry:
+    """Name-indexed speaker configs that reload only when speakers.json changes
+
+    The config path is resolved once; afterwards the file's mtime is checked at
+    most every SPEAKER_RELOAD_CHECK_INTERVAL seconds. Each speaker's static
+    prompt prefix is built at load time so prompts only append the volatile parts.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._speakers = {}
+        self._prefixes = {}
+        self._budgets = {}
+        self._routes = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._speakers and now - self._checked_at < SPEAKER_RELOAD_CHECK_INTERVAL:
+            return
+        with self._lock:
+            self._checked_at = now
+            if self.path is None or not os.path.isfile(self.path):
+                self.path = find_speakers_file()
+                if self.path is None:
+                    return
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return
+            if mtime != self._mtime:
+                self._load(mtime)
+
+    def _load(self, mtime):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            # Keep serving the last good roster rather than dropping every speaker
+            print(f"Error: Invalid JSON in {self.path}: {str(e)}", file=sys.stderr)
+            return
+
+        entries = data.get("speakers", []) if isinstance(data, dict) else []
+        speakers, prefixes = {}, {}
+        for index, entry in enumerate(entries):
+            problems = validate_speaker(entry)
+            if problems:
+                print(f"Error: Skipping speaker #{index} in {self.path}: {'; '.join(problems)}", file=sys.stderr)
+                continue
+            name = entry["name"]
+            if name in speakers:
+                print(f"Error: Duplicate speaker '{name}' in {self.path}, keeping the first entry", file=sys.stderr)
+                continue
+            speakers[name] = entry
+            prefixes[name] = f"{entry['prompt_template']}\n\n"
+
+        budgets = data.get("budgets", {}) if isinstance(data, dict) else {}
+        problems = validate_budgets(budgets)
+        if problems:
+            print(f"Error: Ignoring default budgets in {self.path}: {'; '.join(problems)}", file=sys.stderr)
+            budgets = {}
+
+        routes = data.get("routes", {}) if isinstance(data, dict) else {}
+        problems = validate_routes(routes)
+        if problems:
+            print(f"Error: Ignoring default routes in {self.path}: {'; '.join(problems)}", file=sys.stderr)
+            routes = {}
+
+        self._speakers, self._prefixes, self._budgets, self._routes, self._mtime = speakers, prefixes, budgets, routes, mtime
+        log_debug(f"Debug: Successfully loaded {len(speakers)} speakers from {self.path}")
+
+    def get(self, name):
+        """Return the config dict for name, or None"""
+        self._refresh()
+        return self._speakers.get(name)
+
+    def prompt_prefix(self, name):
+        """Return the precompiled static system-prompt prefix for name"""
+        self._refresh()
+        return self._prefixes[name]
+
+    def budgets(self):
+        """Return the roster-wide budget overrides from speakers.json"""
+        self._refresh()
+        return self._budgets
+
+    def routes(self):
+        """Return the roster-wide model route overrides from speakers.json"""
+        self._refresh()
+        return self._routes
+
+    def names(self):
+        self._refresh()
+        return list(self._speakers)
+
+    def as_dict(self):
+        self._refresh()
+        return dict(self._speakers)
+
+_speaker_registry = None
+
+def get_speaker_registry():
+    """Return the process-wide speaker registry"""
+    global _speaker_registry
+    if _speaker_registry is None:
+        _speaker_registry = SpeakerRegistry()
+    return _speaker_registry
+
+def load_speaker_configs():
+    """Load speaker configurations from speakers.json"""
+    return get_speaker_registry().as_dict()
+
+def mode_instruction(speaker_name, topic, user_question="", is_debate_continuation=False):
+    """Return the per-turn instruction for the request mode"""
+    if user_question:
+        return (f"Audience question: \"{user_question}\"\n\n"
+                f"Respond as {speaker_name} in 2-3 sentences. Be direct and authentic to your character.")
+    if is_debate_continuation:
+        return f"Continue the debate about {topic} as {speaker_name}. Respond in 2-3 sentences. Stay in character and be direct."
+    return (f"Start the debate about {topic} as {speaker_name}. "
+            f"Give your initial thoughts in 2-3 sentences. Be engaging and authentic to your character.")
+
+def build_speaker_prompt(speaker_name, topic, context="", user_question="", is_debate_continuation=False):
+    """Build the system prompt for one turn from the speaker's precompiled prefix"""
+    prompt = get_speaker_registry().prompt_prefix(speaker_name) + f"Topic: {topic}\n\n"
+    if context and (user_question or is_debate_continuation):
+        prompt += f"Previous conversation context:\n{context}\n\n"
+    return prompt + mode_instruction(speaker_name, topic, user_question, is_debate_continuation)
+
+# Debate context compaction settings
+CONTEXT_TOKEN_BUDGET = int(os.getenv("GMI_CONTEXT_TOKEN_BUDGET", "800"))
+CONTEXT_RECENT_TURNS = int(os.getenv("GMI_CONTEXT_RECENT_TURNS", "4"))
+CONTEXT_GIST_WORDS = 30
+CONTEXT_SUMMARY_CACHE_ENTRIES = 64
+
+_TURN_PREFIX_RE = re.compile(r"^([^:\n]{1,60}):\s")
+_FIRST_SENTENCE_RE = re.compile(r"^(.+?[.!?])(?:\s|$)")
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) used for prompt budgeting"""
+    return (len(text) + 3) // 4
+
+def split_context_turns(context):
+    """Split the joined debate history into "Speaker: text" turns"""
+    turns = []
+    for line in context.split('\n'):
+        if not line.strip():
+            continue
+        if _TURN_PREFIX_RE.match(line) or not turns:
+            turns.append(line.strip())
+        else:
+            # Multi-line answers belong to the turn that started them
+            turns[-1] += " " + line.strip()
+    return turns
+
+def summarize_turn(turn):
+    """Reduce a turn to its speaker and first sentence, capped at CONTEXT_GIST_WORDS words"""
+    match = _TURN_PREFIX_RE.match(turn)
+    speaker, text = (match.group(1), turn[match.end():]) if match else ("", turn)
+    sentence = _FIRST_SENTENCE_RE.match(text.strip())
+    gist = sentence.group(1) if sentence else text.strip()
+    words = gist.split()
+    if len(words) > CONTEXT_GIST_WORDS:
+        gist = " ".join(words[:CONTEXT_GIST_WORDS]) + "..."
+    return f"{speaker}: {gist}" if speaker else gist
+
+class ContextCompactor:
+    """Keeps the prompt context under a token budget as the debate grows
+
+    The last `recent_turns` turns are passed verbatim; older turns are folded
+    into a rolling summary of one-sentence gists. Summaries are cached by a
+    hash chain over the folded turns, so each new turn only folds the turns
+    that dropped out of the verbatim window since the last call.
+    """
+
+    def __init__(self, token_budget=CONTEXT_TOKEN_BUDGET, recent_turns=CONTEXT_RECENT_TURNS, cache_path=None):
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.cache_path = cache_path
+        self._summaries = None
+        self._lock = threading.Lock()
+
+    def _load_summaries(self):
+        if self._summaries is None:
+            cached = read_json_file(self.cache_path, {}) if self.cache_path else {}
+            self._summaries = cached if isinstance(cached, dict) else {}
+        return self._summaries
+
+    def _store_summary(self, key, gists):
+        summaries = self._load_summaries()
+        summaries.pop(key, None)
+        summaries[key] = gists
+        while len(summaries) > CONTEXT_SUMMARY_CACHE_ENTRIES:
+            summaries.pop(next(iter(summaries)))
+        if self.cache_path:
+            try:
+                write_json_file(self.cache_path, summaries)
+            except OSError as e:
+                log_info(f"Debug: Could not persist context summary cache: {str(e)}")
+
+    def rolling_summary(self, turns):
+        """Return the gist list for turns, reusing the longest cached prefix"""
+        with self._lock:
+            return self._rolling_summary(turns)
+
+    def _rolling_summary(self, turns):
+        summaries = self._load_summaries()
+        chain = []
+        digest = ""
+        for turn in turns:
+            digest = hashlib.sha1((digest + "\x00" + turn).encode('utf-8')).hexdigest()
+            chain.append(digest)
+
+        start, gists = 0, []
+        for i in range(len(chain) - 1, -1, -1):
+            if chain[i] in summaries:
+                start, gists = i + 1, list(summaries[chain[i]])
+                break
+        if start == len(turns):
+            return gists
+
+        gists.extend(summarize_turn(turn) for turn in turns[start:])
+        self._store_summary(chain[-1], gists)
+        return gists
+
+    def split(self, context, fold_step=1):
+        """Return (gists, recent turns) for context, summarizing older turns to fit the token budget
+
+        With fold_step > 1 turns leave the verbatim window in blocks of that size,
+        so the summary and the turns after it stay unchanged for fold_step calls.
+        """
+        turns = split_context_turns(context) if context else []
+        if not context or estimate_tokens(context) <= self.token_budget:
+            return [], turns
+
+        # Push verbatim turns into the summary until they fit, always keeping the latest one
+        sizes = [estimate_tokens(turn) + 1 for turn in turns]
+        split = max(len(turns) - self.recent_turns, 0)
+        while split < len(turns) - 1 and sum(sizes[split:]) > self.token_budget * 3 // 4:
+            split += 1
+        if fold_step > 1:
+            # Move the boundary a whole block at a time, back while the budget allows, otherwise forward
+            block = split // fold_step * fold_step
+            if sum(sizes[block:]) > self.token_budget:
+                block = min(block + fold_step, len(turns) - 1)
+            split = block
+        older, recent = turns[:split], turns[split:]
+        recent_tokens = sum(sizes[split:])
+        if recent_tokens > self.token_budget:
+            recent[0] = recent[0][:self.token_budget * 4] + "..."
+            recent_tokens = estimate_tokens(recent[0])
+
+        kept = []
+        if older:
+            # Drop the oldest gists once the summary outgrows what the budget leaves over
+            gists = self.rolling_summary(older)
+            # A fixed share when folding in blocks, so the summary doesn't shrink as the verbatim turns grow
+            share = self.token_budget // 4 if fold_step > 1 else self.token_budget - recent_tokens
+            remaining = share - estimate_tokens("Summary of earlier discussion:")
+            for gist in reversed(gists):
+                remaining -= estimate_tokens(gist) + 3
+                if remaining < 0:
+                    break
+                kept.append(gist)
+            kept.reverse()
+        summary_tokens = sum(estimate_tokens(gist) + 3 for gist in kept)
+        log_debug(f"Debug: Compacted context from ~{estimate_tokens(context)} to ~{recent_tokens + summary_tokens} tokens "
+                  f"({len(older)} summarized, {len(recent)} verbatim turns)")
+        return kept, recent
+
+    def compact(self, context):
+        """Return context reduced to fit the token budget"""
+        if not context or estimate_tokens(context) <= self.token_budget:
+            return context
+
+        gists, recent = self.split(context)
+        lines = []
+        if gists:
+            lines.append("Summary of earlier discussion:")
+            lines.extend(f"- {gist}" for gist in gists)
+            lines.append("")
+        lines.extend(recent)
+        return "\n".join(lines)
+
+_context_compactor = None
+
+def get_context_compactor():
+    """Return the process-wide context compactor with its on-disk summary cache"""
+    global _context_compactor
+    if _context_compactor is None:
+        _context_compactor = ContextCompactor(cache_path=get_cache_path("context_summaries.json"))
+    return _context_compactor
+
+# Message layout for speaker turns: "turns" keeps a byte-stable prefix (speaker system
+# prompt, topic, prior turns in order) so the server's prefix cache can reuse it across
+# turns; "single" is the original one-system-message prompt
+PROMPT_LAYOUT = os.getenv("GMI_PROMPT_LAYOUT", "turns").lower()
+
+def build_speaker_messages(speaker_name, topic, context="", user_question="", is_debate_continuation=False):
+    """Build the chat messages for one turn, ordered from most to least stable
+
+    The system message is the speaker's static prefix and the first user message
+    the topic; prior turns follow in order (the speaker's own as assistant
+    messages, everyone else's as user messages) and the mode instruction comes
+    last. Each call only appends to the previous call's messages, until older
+    turns are folded into the summary, which happens CONTEXT_RECENT_TURNS at a time.
+    """
+    messages = [{"role": "system", "content": get_speaker_registry().prompt_prefix(speaker_name).rstrip()},
+                {"role": "user", "content": f"Topic: {topic}"}]
+    if not (user_question or is_debate_continuation):
+        context = ""  # An opening statement doesn't build on earlier turns
+    gists, turns = get_context_compactor().split(context, fold_step=max(1, CONTEXT_RECENT_TURNS))
+    if gists:
+        messages.append({"role": "user", "content": "Summary of earlier discussion:\n" +
+                         "\n".join(f"- {gist}" for gist in gists)})
+    for turn in turns:
+        match = _TURN_PREFIX_RE.match(turn)
+        if match and match.group(1) == speaker_name:
+            messages.append({"role": "assistant", "content": turn[match.end():]})
+        else:
+            messages.append({"role": "user", "content": turn})
+    messages.append({"role": "user", "content": mode_instruction(speaker_name, topic, user_question,
+                                                                 is_debate_continuation)})
+
+    # Merge runs of same-role messages for servers that require alternating roles;
+    # merging only appends to the earlier message, so the prefix stays stable
+    merged = [messages[0]]
+    for message in messages[1:]:
+        if message["role"] == merged[-1]["role"]:
+            merged[-1] = {"role": message["role"], "content": merged[-1]["content"] + "\n\n" + message["content"]}
+        else:
+            merged.append(message)
+    return merged
+
+# Lines in R1 reasoning that are the model thinking aloud rather than the answer
+_REASONING_PREAMBLE_RE = re.compile(
+    r"(?:Okay,|Hmm|I need|Key points:|Remember,|As|The tension|I recall|Right,|But since|We are discussing)")
+
+# Finish reasons of a completion that was cut off by its token budget
+BUDGET_FINISH_REASONS = ("length", "reasoning_limit")
+TRUNCATED_FINISH_REASONS = BUDGET_FINISH_REASONS + ("deadline",)
+
+def is_cut_off_in_reasoning(choice):
+    """Return True if a completion choice was cut off before it produced any answer text"""
+    return choice.get("finish_reason") in TRUNCATED_FINISH_REASONS and not (choice.get("message") or {}).get("content")
+
+def is_cacheable_completion(resp_json):
+    """Return True unless a completion is a cut-off reasoning trace or was stopped by the deadline"""
+    choice = (resp_json.get("choices") or [{}])[0]
+    return choice.get("finish_reason") != "deadline" and not is_cut_off_in_reasoning(choice)
+
+def extract_answer_text(message, finish_reason=None):
+    """Return the answer from a completion message, falling back to the reasoning trace
+
+    R1 sometimes returns an empty `content` with the answer buried at the end of
+    `reasoning_content`; take the last line that is not thinking-aloud, else the
+    last reasonably long line. A completion cut off by its budget or the turn
+    deadline (see TRUNCATED_FINISH_REASONS) with no content is unfinished reasoning, not
+    an answer, and yields "".
+    """
+    result = message.get("content") or ""
+    if result or not message.get("reasoning_content") or finish_reason in TRUNCATED_FINISH_REASONS:
+        return result
+    lines = [line.strip() for line in message["reasoning_content"].split('\n')]
+    for line in reversed(lines):
+        if line and not _REASONING_PREAMBLE_RE.match(line):
+            return line
+    for line in reversed(lines):
+        if len(line) > 20:  # Reasonable length for a response
+            return line
+    return ""
+
+# Per-mode output budgets. max_tokens caps the whole completion (reasoning included);
+# max_reasoning_tokens stops a streamed completion that is still reasoning past it.
+# Both can be overridden in speakers.json, globally under "budgets" or per speaker.
+REQUEST_MODES = ("initial", "continuation", "question", "topic")
+MODE_BUDGETS = {
+    "initial": {"max_tokens": 1536, "max_reasoning_tokens": 1024},
+    "continuation": {"max_tokens": 1536, "max_reasoning_tokens": 1024},
+    "question": {"max_tokens": 1536, "max_reasoning_tokens": 1024},
+    "topic": {"max_tokens": 768, "max_reasoning_tokens": 512},
+}
+
+def request_mode(user_question="", is_debate_continuation=False):
+    """Return the budget mode for a speaker request"""
+    if user_question:
+        return "question"
+    return "continuation" if is_debate_continuation else "initial"
+
+def get_mode_budget(mode, speaker=None):
+    """Return the budget for mode, layering speakers.json overrides over the defaults"""
+    budget = dict(MODE_BUDGETS[mode])
+    budget.update(get_speaker_registry().budgets().get(mode, {}))
+    if speaker:
+        budget.update((speaker.get("budgets") or {}).get(mode, {}))
+    return budget
+
+# Per-mode model routing: each mode maps to a primary model and ordered alternates, each
+# with a latency SLO in seconds for the whole call. Routes can be overridden in
+# speakers.json, globally under "routes" or per speaker; an override replaces the list.
+REASONING_MODEL = os.getenv("GMI_REASONING_MODEL", "deepseek-ai/DeepSeek-R1-0528")
+FAST_MODEL = os.getenv("GMI_FAST_MODEL", "deepseek-ai/DeepSeek-V3-0324")
+ROUTE_MODES = REQUEST_MODES + ("health",)
+MODEL_ROUTES = {
+    "initial": [{"model": REASONING_MODEL, "slo": 20.0}, {"model": FAST_MODEL, "slo": 8.0}],
+    "continuation": [{"model": FAST_MODEL, "slo": 8.0}, {"model": REASONING_MODEL, "slo": 20.0}],
+    "question": [{"model": REASONING_MODEL, "slo": 20.0}, {"model": FAST_MODEL, "slo": 8.0}],
+    "topic": [{"model": FAST_MODEL, "slo": 5.0}, {"model": REASONING_MODEL, "slo": 20.0}],
+    "health": [{"model": FAST_MODEL, "slo": 10.0}],
+}
+ROUTE_SLO_PERCENTILE = float(os.getenv("GMI_ROUTE_SLO_PERCENTILE", "90"))
+ROUTE_RECOVERY_INTERVAL = float(os.getenv("GMI_ROUTE_RECOVERY_INTERVAL", "60"))
+ROUTE_MIN_SAMPLES = 5
+ROUTE_WINDOW = 20
+
+def get_model_route(mode, speaker=None):
+    """Return the [{"model", "slo"}, ...] route for mode: the speaker's, else speakers.json's, else the default"""
+    route = (speaker.get("routes") or {}).get(mode) if speaker else None
+    route = route or get_speaker_registry().routes().get(mode) or MODEL_ROUTES[mode]
+    return [{"model": entry["model"], "slo": float(entry.get("slo", TURN_DEADLINE))} for entry in route]
+
+def iter_sse_events(lines):
+    """Yield the data payload of each server-sent event from an iterable of raw lines"""
+    data_lines = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        line = line.rstrip('\r')
+        if not line:
+            # A blank line terminates the current event
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+            continue
+        if line.startswith(':'):
+            continue  # SSE comment / keep-alive
+        field, _, value = line.partition(':')
+        if value.startswith(' '):
+            value = value[1:]
+        if field == 'data':
+            data_lines.append(value)
+    if data_lines:
+        yield "\n".join(data_lines)
+
+def _pump_stream(response, events):
+    """Read SSE payloads off the socket into a queue, ending with ("end", None) or ("error", exception)"""
+    try:
+        for data in iter_sse_events(response.iter_lines(chunk_size=None)):
+            events.put(("data", data))
+        events.put(("end", None))
+    except Exception as e:
+        events.put(("error", e))
+
+def read_streamed_completion(response, on_delta, on_reasoning, max_reasoning_tokens=None, deadline=None):
+    """Consume a streamed chat completion, forwarding deltas as they arrive
+
+    If the model is still reasoning after max_reasoning_tokens, the stream is
+    abandoned with finish_reason "reasoning_limit". A stream still running at
+    deadline (a time.monotonic() value), whether trickling or stalled, is
+    abandoned with finish_reason "deadline" and keeps the text received so far.
+    The socket is read on a daemon thread, so a stalled read cannot hold the
+    turn past the deadline. Returns a dict shaped like a non-streaming response
+    so callers can share the same result handling.
+    """
+    import queue
+    reasoning_tokens = 0
+    content_parts = []
+    reasoning_parts = []
+    finish_reason = None
+    usage = None
+
+    events = queue.Queue()
+    threading.Thread(target=_pump_stream, args=(response, events), name="gmi-stream", daemon=True).start()
+    try:
+        while True:
+            try:
+                kind, data = events.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                kind, data = "error", _requests().exceptions.ReadTimeout("Stream stalled past the turn deadline")
+            if kind == "end" or (kind == "data" and data.strip() == "[DONE]"):
+                break
+            if kind == "error":
+                # The per-read socket timeout is the whole call's budget, so a read timeout means the deadline passed
+                if deadline is None or not isinstance(data, _requests().exceptions.Timeout):
+                    raise data
+                log_debug("Debug: Stream stalled at the turn deadline, keeping the answer so far")
+                finish_reason = "deadline"
+                break
+            chunk = json.loads(data)
+            if "error" in chunk:
+                return {"error": chunk["error"]}
+            if chunk.get("usage"):
+                usage = chunk["usage"]
+            for choice in chunk.get("choices") or []:
+                delta = choice.get("delta") or {}
+                if delta.get("reasoning_content"):
+                    reasoning_parts.append(delta["reasoning_content"])
+                    reasoning_tokens += estimate_tokens(delta["reasoning_content"])
+                    on_reasoning(delta["reasoning_content"])
+                if delta.get("content"):
+                    content_parts.append(delta["content"])
+                    on_delta(delta["content"])
+                if choice.get("finish_reason"):
+                    finish_reason = choice["finish_reason"]
+            if max_reasoning_tokens and not content_parts and reasoning_tokens > max_reasoning_tokens:
+                finish_reason = "reasoning_limit"
+                break
+            if deadline is not None and time.monotonic() >= deadline and finish_reason is None:
+                log_debug("Debug: Stream still running at the turn deadline, cutting it off")
+                finish_reason = "deadline"
+                break
+    finally:
+        response.close()
+
+    message = {"role": "assistant", "content": "".join(content_parts)}
+    if reasoning_parts:
+        message["reasoning_content"] = "".join(reasoning_parts)
+    result = {"choices": [{"index": 0, "message": message, "finish_reason": finish_reason}]}
+    if usage:
+        result["usage"] = usage
+    return result
+
+# Client-side rate limiting shared by every process using the same cache directory
+RATE_LIMIT_RPM = float(os.getenv("GMI_RATE_LIMIT_RPM", "0"))  # requests per minute, 0 = no quota
+RATE_LIMIT_TPM = float(os.getenv("GMI_RATE_LIMIT_TPM", "0"))  # prompt + completion tokens per minute, 0 = no quota
+RATE_LIMIT_BURST = float(os.getenv("GMI_RATE_LIMIT_BURST", "5"))  # seconds of quota that may be spent at once
+RATE_LIMIT_POLL = 0.1
+RATE_LIMIT_TICKET_TTL = 5.0  # queued callers that stop polling for this long lose their place
+
+class RateLimitTimeout(Exception):
+    """Raised when the rate limiter cannot admit a request before the turn deadline"""
+
+def parse_reset_duration(value):
+    """Return seconds from a rate-limit reset header such as "20ms", "1.5s", "6m0s" or "30", or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value.strip())
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute, shared across processes through a locked state file
+
+    Callers take a ticket in a FIFO queue and only the head of the queue may spend
+    from the buckets, so waiting processes are admitted in arrival order instead of
+    racing each other. Each bucket holds RATE_LIMIT_BURST seconds of quota, which
+    keeps throughput just under the limit rather than bursting into 429s. Server
+    feedback tightens the shared state: a 429's Retry-After (or an exhausted quota's
+    reset header) blocks every caller until it passes, and remaining-quota headers
+    lower the buckets when the key is also used from elsewhere.
+    """
+
+    def __init__(self, path, rpm=RATE_LIMIT_RPM, tpm=RATE_LIMIT_TPM, burst=RATE_LIMIT_BURST):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.buckets = {}  # name -> (refill per second, capacity)
+        if rpm > 0:
+            self.buckets["requests"] = (rpm / 60.0, max(1.0, rpm / 60.0 * burst))
+        if tpm > 0:
+            self.buckets["tokens"] = (tpm / 60.0, max(1.0, tpm / 60.0 * burst))
+        self._tickets = 0
+        self._lock = threading.Lock()
+
+    def _update(self, change):
+        """Run change(state, now) on the refilled shared state under the file lock and save it"""
+        with FileLock(self.lock_path):
+            state = read_json_file(self.path, {})
+            now = time.time()
+            for name, (rate, capacity) in self.buckets.items():
+                bucket = state.setdefault(name, {"level": capacity, "updated": now})
+                bucket["level"] = min(capacity, bucket["level"] + (now - bucket["updated"]) * rate)
+                bucket["updated"] = now
+            result = change(state, now)
+            write_json_file(self.path, state)
+        return result
+
+    def acquire(self, tokens, deadline, block=True):
+        """Wait in line for one request and `tokens` tokens; returns the seconds spent waiting
+
+        Raises RateLimitTimeout if the request cannot be admitted before deadline
+        (a time.monotonic() value), or at once if block is False.
+        """
+        with self._lock:
+            self._tickets += 1
+            ticket = f"{os.getpid()}-{self._tickets}"
+        cost = {"requests": 1.0, "tokens": float(tokens)}
+        started = time.monotonic()
+
+        def take_turn(state, now):
+            queue = [t for t in state.get("queue", []) if now - t["seen"] < RATE_LIMIT_TICKET_TTL]
+            entry = next((t for t in queue if t["id"] == ticket), None)
+            if entry is None:
+                entry = {"id": ticket}
+                queue.append(entry)
+            entry["seen"] = now
+            wait = max(0.0, state.get("blocked_until", 0) - now)
+            if not self.buckets and wait == 0:
+                queue.remove(entry)  # no quota configured and not blocked: nothing to queue for
+            elif queue[0] is entry:
+                for name, (rate, capacity) in self.buckets.items():
+                    # A request larger than the bucket may run once the bucket is full; the debt is repaid later
+                    shortfall = min(cost[name], capacity) - state[name]["level"]
+                    if shortfall > 0:
+                        wait = max(wait, shortfall / rate)
+                if wait == 0:
+                    for name in self.buckets:
+                        state[name]["level"] -= cost[name]
+                    queue.remove(entry)
+            else:
+                wait = max(wait, RATE_LIMIT_POLL)
+            state["queue"] = queue
+            return wait
+
+        def leave_queue(state, now):
+            state["queue"] = [t for t in state.get("queue", []) if t["id"] != ticket]
+
+        waited = False
+        while True:
+            wait = self._update(take_turn)
+            if wait == 0:
+                return time.monotonic() - started if waited else 0.0
+            if not block or time.monotonic() + wait > deadline:
+                self._update(leave_queue)
+                raise RateLimitTimeout(f"Rate limit: no slot within the deadline (next in {wait:.1f}s)")
+            # Poll at least every second so the ticket stays fresh in the queue
+            time.sleep(min(wait, 1.0))
+            waited = True
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """Return over-estimated tokens to the bucket (or charge the extra) once usage is known"""
+        if "tokens" not in self.buckets or actual_tokens is None or actual_tokens == estimated_tokens:
+            return
+
+        def adjust(state, now):
+            capacity = self.buckets["tokens"][1]
+            state["tokens"]["level"] = min(capacity, state["tokens"]["level"] + estimated_tokens - actual_tokens)
+
+        self._update(adjust)
+
+    def observe(self, response):
+        """Apply Retry-After and x-ratelimit-* headers from a response to the shared state"""
+        headers = response.headers
+        blocked_for = None
+        if response.status_code == 429:
+            blocked_for = parse_retry_after(headers.get("Retry-After")) or 1.0
+        remaining = {}
+        for name in ("requests", "tokens"):
+            value = headers.get(f"x-ratelimit-remaining-{name}")
+            try:
+                remaining[name] = float(value)
+            except (TypeError, ValueError):
+                continue
+            if remaining[name] <= 0:
+                reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{name}"))
+                if reset is not None:
+                    blocked_for = max(blocked_for or 0.0, reset)
+        if blocked_for is None and not any(name in self.buckets for name in remaining):
+            return
+
+        def apply(state, now):
+            if blocked_for is not None:
+                state["blocked_until"] = max(state.get("blocked_until", 0), now + blocked_for)
+                for name in self.buckets:
+                    state[name]["level"] = min(state[name]["level"], 0.0)
+            for name, value in remaining.items():
+                if name in self.buckets:
+                    state[name]["level"] = min(state[name]["level"], value)
+
+        if blocked_for is not None:
+            log_info(f"Debug: Rate limited by the API, pausing all callers for {blocked_for:.1f}s")
+        self._update(apply)
+
+    def stats(self):
+        state = self._update(lambda state, now: dict(state, now=now))
+        return {
+            "limits": {name: {"per_minute": rate * 60, "capacity": capacity} for name, (rate, capacity) in self.buckets.items()},
+            "levels": {name: round(state[name]["level"], 1) for name in self.buckets},
+            "queued": len(state.get("queue", [])),
+            "blocked_for": round(max(0.0, state.get("blocked_until", 0) - state["now"]), 1),
+        }
+
+_rate_limiter = None
+
+def get_rate_limiter():
+    """Return the process-wide rate limiter backed by the shared state file"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(get_cache_path("ratelimit.json"))
+    return _rate_limiter
+
+def estimate_request_tokens(payload):
+    """Upper-bound token cost of a chat completion: the prompt plus its max_tokens"""
+    prompt = sum(estimate_tokens(str(message.get("content", ""))) for message in payload.get("messages", []))
+    return prompt + int(payload.get("max_tokens") or 0)
+
+# Tail-latency policy for completion calls: each call runs under one overall deadline,
+# a hedged duplicate is sent when the first attempt is slower than the recent
+# GMI_HEDGE_PERCENTILE latency, and retryable failures back off with jitter and retry
+TURN_DEADLINE = float(os.getenv("GMI_TURN_DEADLINE", "30"))
+MAX_RETRIES = int(os.getenv("GMI_MAX_RETRIES", "2"))
+RETRY_BASE_DELAY = float(os.getenv("GMI_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("GMI_RETRY_MAX_DELAY", "8"))
+HEDGE_PERCENTILE = float(os.getenv("GMI_HEDGE_PERCENTILE", "95"))  # 0 disables hedging
+HEDGE_MIN_DELAY = float(os.getenv("GMI_HEDGE_MIN_DELAY", "1"))
+HEDGE_MIN_SAMPLES = int(os.getenv("GMI_HEDGE_MIN_SAMPLES", "10"))
+LATENCY_WINDOW = 200
+
+class LatencyTracker:
+    """Rolling window of successful request latencies per key, shared through a JSON file
+
+    Keys separate modes and streamed (time to headers) from non-streamed (time
+    to full body) requests. hedge_delay() returns None until HEDGE_MIN_SAMPLES
+    latencies are known, so a fresh install never hedges on a guess.
+    """
+
+    def __init__(self, path, window=LATENCY_WINDOW):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.window = window
+        self._samples = None
+        self._lock = threading.Lock()
+
+    def _update(self, change):
+        with FileLock(self.lock_path):
+            samples = read_json_file(self.path, {})
+            change(samples)
+            write_json_file(self.path, samples)
+        return samples
+
+    def record(self, key, seconds):
+        def add(samples):
+            samples[key] = samples.get(key, [])[-(self.window - 1):] + [round(seconds, 3)]
+        try:
+            samples = self._update(add)
+        except OSError as e:
+            log_info(f"Debug: Could not persist request latency: {str(e)}")
+            return
+        with self._lock:
+            self._samples = samples
+
+    def hedge_delay(self, key):
+        if HEDGE_PERCENTILE <= 0:
+            return None
+        with self._lock:
+            if self._samples is None:
+                self._samples = read_json_file(self.path, {})
+            window = self._samples.get(key, [])
+        if len(window) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY, percentile(window, HEDGE_PERCENTILE))
+
+_latency_tracker = None
+
+def get_latency_tracker():
+    """Return the process-wide latency tracker backed by the shared latency file"""
+    global _latency_tracker
+    if _latency_tracker is None:
+        _latency_tracker = LatencyTracker(get_cache_path("latency.json"))
+    return _latency_tracker
+
+def parse_retry_after(value):
+    """Return the seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_delay(retry, retry_after=None):
+    """Capped exponential backoff with full jitter; a Retry-After hint is the minimum"""
+    import random
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** retry)))
+    return max(delay, retry_after) if retry_after is not None else delay
+
+def is_retryable(response, error):
+    """Connection failures, timeouts, 5xx and 429 are worth another attempt"""
+    if error is not None:
+        exceptions = _requests().exceptions
+        return isinstance(error, (exceptions.ConnectionError, exceptions.Timeout))
+    return response.status_code == 429 or is_breaker_failure_status(response.status_code)
+
+def _close_late_attempts(results, pending):
+    """Close responses of attempts that lost a race so their connections return to the pool"""
+    for _ in range(pending):
+        outcome = results.get()
+        if outcome["response"] is not None:
+            outcome["response"].close()
+
+def race_attempts(url, headers, payload, stream, deadline, hedge_delay=None, admit_hedge=None):
+    """POST once, plus a hedged duplicate if no usable response arrives within hedge_delay
+
+    Returns the first usable outcome, or the first failure if every attempt failed.
+    An outcome is a dict with response, error, elapsed, connect, hedge (True if it
+    came from the duplicate) and launched (attempts sent). Attempts run on daemon
+    threads so a stuck request cannot outlive the deadline of the turn. The
+    hedge is only sent if admit_hedge() (if given) returns True.
+    """
+    import queue
+    results = queue.Queue()
+
+    def attempt(hedge):
+        started = time.monotonic()
+        _connection_timing.connect = 0.0
+        try:
+            response = get_http_session().post(url, headers=headers, json=payload, stream=stream,
+                                               timeout=max(1.0, deadline - started))
+            error = None
+            get_rate_limiter().observe(response)
+        except Exception as e:
+            response, error = None, e
+        results.put({"response": response, "error": error, "elapsed": time.monotonic() - started,
+                     "connect": _connection_timing.connect, "hedge": hedge})
+
+    threading.Thread(target=attempt, args=(False,), name="gmi-attempt", daemon=True).start()
+    launched, finished = 1, 0
+    winner = failure = None
+    hedge_at = time.monotonic() + hedge_delay if hedge_delay else None
+    while winner is None and finished < launched:
+        wait_until = deadline if hedge_at is None else min(deadline, hedge_at)
+        try:
+            outcome = results.get(timeout=max(0.0, wait_until - time.monotonic()))
+        except queue.Empty:
+            if hedge_at is not None and time.monotonic() < deadline:
+                hedge_at = None
+                if admit_hedge is None or admit_hedge():
+                    launched += 1
+                    threading.Thread(target=attempt, args=(True,), name="gmi-hedge", daemon=True).start()
+                continue
+            break
+        finished += 1
+        if not is_retryable(outcome["response"], outcome["error"]):
+            winner = outcome
+        elif failure is None:
+            failure = outcome
+        elif outcome["response"] is not None:
+            outcome["response"].close()
+
+    if finished < launched:
+        threading.Thread(target=_close_late_attempts, args=(results, launched - finished), daemon=True).start()
+    if winner is None:
+        winner = failure or {"response": None, "connect": 0.0, "elapsed": TURN_DEADLINE, "hedge": False,
+                             "error": _requests().exceptions.Timeout(f"No response within the {TURN_DEADLINE:g}s deadline")}
+    elif failure is not None and failure["response"] is not None:
+        failure["response"].close()
+    winner["launched"] = launched
+    return winner
+
+def post_chat_completion(payload, stream=False, on_delta=None, on_reasoning=None, label="API",
+                         max_reasoning_tokens=None, metrics=None, deadline=None):
+    """POST a chat completion and return (status_code, response dict)
+
+    The request runs under the GMI_TURN_DEADLINE tail-latency policy (hedging
+    and jittered retries, see race_attempts), or until deadline (a
+    time.monotonic() value) if one is given. Records the outcome on the circuit
+    breaker and, if given, connection and token timings on metrics. Raises
+    requests exceptions on network failures and json.JSONDecodeError if the
+    body is not valid JSON.
+    """
+    url = API_URL
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {API_KEY}"
+    }
+    breaker = get_circuit_breaker()
+
+    # Full request dumps only at debug level, and never with the bearer token
+    if LOG_LEVEL <= LOG_LEVELS["debug"]:
+        log_debug(f"🔍 {label} REQUEST DEBUG:")
+        log_debug(f"URL: {url}")
+        log_debug(f"Payload: {json.dumps(payload, separators=(',', ':'))}")
+
+    if stream and metrics is not None and on_delta is not None:
+        forward_delta = on_delta
+
+        def on_delta(delta):
+            metrics.mark_once("first_token")
+            forward_delta(delta)
+
+    deadline = deadline or time.monotonic() + TURN_DEADLINE
+    tracker = get_latency_tracker()
+    limiter = get_rate_limiter()
+    request_tokens = estimate_request_tokens(payload)
+
+    def admit_hedge():
+        # Hedges only use spare quota; they never queue behind other callers
+        try:
+            limiter.acquire(request_tokens, deadline, block=False)
+            return True
+        except RateLimitTimeout:
+            return False
+
+    latency_key = (f"{payload.get('model')}|{metrics.fields['mode'] if metrics is not None else label}:"
+                   f"{'stream' if stream else 'full'}")
+    attempts, retries, hedged, rate_wait = 0, 0, False, 0.0
+    while True:
+        try:
+            rate_wait += limiter.acquire(request_tokens, deadline)
+        except RateLimitTimeout:
+            if metrics is not None:
+                metrics.set(attempts=attempts, retries=retries, rate_wait=round(rate_wait, 3))
+            raise
+        outcome = race_attempts(url, headers, payload, stream, deadline, tracker.hedge_delay(latency_key), admit_hedge)
+        attempts += outcome["launched"]
+        hedged = hedged or outcome["launched"] > 1
+        response, error = outcome["response"], outcome["error"]
+        if retries >= MAX_RETRIES or not is_retryable(response, error):
+            break
+        delay = retry_delay(retries, parse_retry_after(response.headers.get("Retry-After")) if response is not None else None)
+        if time.monotonic() + delay >= deadline:
+            break
+        reason = f"status {response.status_code}" if response is not None else type(error).__name__
+        log_debug(f"Debug: {label} attempt failed ({reason}), retrying in {delay:.2f}s")
+        if response is not None:
+            response.close()
+        limiter.settle(request_tokens, 0)  # a failed attempt used no completion tokens
+        time.sleep(delay)
+        retries += 1
+
+    if metrics is not None:
+        metrics.set(connect=round(outcome["connect"], 4), attempts=attempts, retries=retries,
+                    hedged=hedged, hedge_won=outcome["hedge"], rate_wait=round(rate_wait, 3))
+    if error is not None:
+        breaker.record_failure(f"{label} request failed: {str(error)}")
+        raise error
+    if metrics is not None:
+        metrics.set(status=response.status_code, ttfb=round(response.elapsed.total_seconds(), 4))
+    if response.status_code == 200:
+        tracker.record(latency_key, outcome["elapsed"])
+    if is_breaker_failure_status(response.status_code):
+        breaker.record_failure(f"{label} request returned status {response.status_code}")
+    else:
+        breaker.record_success()
+    is_event_stream = stream and response.headers.get("Content-Type", "").startswith("text/event-stream")
+
+    if LOG_LEVEL <= LOG_LEVELS["debug"]:
+        log_debug(f"🔍 {label} RESPONSE DEBUG:")
+        log_debug(f"Status Code: {response.status_code}")
+        log_debug(f"Response Headers: {json.dumps(dict(response.headers), separators=(',', ':'))}")
+        if not is_event_stream:
+            log_debug(f"Response Text: {response.text[:1000]}")
+
+    try:
+        if is_event_stream and response.status_code == 200:
+            resp_json = read_streamed_completion(response, on_delta, on_reasoning, max_reasoning_tokens, deadline)
+        else:
+            resp_json = response.json()
+    except json.JSONDecodeError:
+        if not is_event_stream:
+            log_debug(f"Debug: Raw response text: {response.text[:500]}")
+        raise
+    if metrics is not None:
+        metrics.record_response(resp_json)
+    usage = (resp_json.get("usage") or {}) if isinstance(resp_json, dict) else {}
+    if response.status_code != 200:
+        limiter.settle(request_tokens, 0)
+    elif usage.get("total_tokens") or usage.get("completion_tokens"):
+        limiter.settle(request_tokens, usage.get("total_tokens") or
+                       (usage.get("prompt_tokens") or 0) + usage["completion_tokens"])
+    return response.status_code, resp_json
+
+class ModelRouter:
+    """Orders a mode's route by each model's observed latency against its SLO
+
+    Whole-call latencies (retries included, failures counted as the full turn
+    deadline) are kept per model and mode in a JSON file shared by every
+    process. A model whose recent ROUTE_SLO_PERCENTILE latency is over its SLO
+    moves behind the models that meet theirs; every ROUTE_RECOVERY_INTERVAL
+    seconds one request is sent to it anyway so a recovery is noticed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + ".lock"
+
+    def _update(self, change):
+        with FileLock(self.lock_path):
+            state = read_json_file(self.path, {})
+            result = change(state, time.time())
+            write_json_file(self.path, state)
+        return result
+
+    @staticmethod
+    def _misses_slo(entry, samples):
+        return len(samples) >= ROUTE_MIN_SAMPLES and percentile(samples, ROUTE_SLO_PERCENTILE) > entry["slo"]
+
+    def plan(self, mode, speaker=None):
+        """Return the route for mode in the order to try it: models meeting their SLO first"""
+        route = get_model_route(mode, speaker)
+        state = read_json_file(self.path, {})
+        meeting, missing = [], []
+        for entry in route:
+            key = f"{entry['model']}|{mode}"
+            record = state.get(key, {})
+            if not self._misses_slo(entry, record.get("samples", [])):
+                meeting.append(entry)
+            elif time.time() - record.get("probe", 0) >= ROUTE_RECOVERY_INTERVAL and self._claim_probe(key):
+                log_debug(f"Debug: Sending a recovery probe to {entry['model']} for {mode}")
+                meeting.append(entry)
+            else:
+                missing.append(entry)
+        if missing and meeting:
+            log_debug(f"Debug: {', '.join(e['model'] for e in missing)} missing {mode} SLO, routing to {meeting[0]['model']}")
+        return meeting + missing
+
+    def _claim_probe(self, key):
+        """Let exactly one process probe a model that is missing its SLO"""
+        def claim(state, now):
+            record = state.setdefault(key, {"samples": []})
+            if now - record.get("probe", 0) < ROUTE_RECOVERY_INTERVAL:
+                return False
+            record["probe"] = now
+            return True
+        return self._update(claim)
+
+    def record(self, model, mode, seconds):
+        """Record a whole-call latency; None records a failure"""
+        def add(state, now):
+            record = state.setdefault(f"{model}|{mode}", {"samples": []})
+            sample = TURN_DEADLINE if seconds is None else round(seconds, 3)
+            record["samples"] = record["samples"][-(ROUTE_WINDOW - 1):] + [sample]
+            record["updated"] = now
+        try:
+            self._update(add)
+        except OSError as e:
+            log_info(f"Debug: Could not persist route latency: {str(e)}")
+
+    def stats(self):
+        """Return per-route latency percentiles and SLO status for the configured routes"""
+        state = read_json_file(self.path, {})
+        stats = {}
+        for mode in ROUTE_MODES:
+            entries = []
+            for entry in get_model_route(mode):
+                samples = state.get(f"{entry['model']}|{mode}", {}).get("samples", [])
+                entries.append(dict(entry, samples=len(samples),
+                                    p50=percentile(samples, 50) if samples else None,
+                                    slo_percentile=percentile(samples, ROUTE_SLO_PERCENTILE) if samples else None,
+                                    meets_slo=not self._misses_slo(entry, samples)))
+            stats[mode] = entries
+        return stats
+
+_model_router = None
+
+def get_model_router():
+    """Return the process-wide model router backed by the shared routes file"""
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter(get_cache_path("routes.json"))
+    return _model_router
+
+def post_routed_completion(payload, mode, speaker=None, stream=False, on_delta=None, on_reasoning=None, label="API",
+                           max_reasoning_tokens=None, metrics=None):
+    """POST a chat completion to the mode's route, failing over to the next model on failure
+
+    Models are tried in ModelRouter.plan() order within one GMI_TURN_DEADLINE.
+    Each model gets at least its SLO, and otherwise the deadline minus the
+    next model's SLO, so there is time left to fail over. A network error,
+    timeout, 5xx or unknown model (404) moves on to the next model, unless
+    answer text was already streamed. A 429 does not: the quota is per key,
+    so every model on the route shares it. payload["model"] holds the model that
+    answered on return. Raises like post_chat_completion once the route is
+    exhausted.
+    """
+    router = get_model_router()
+    route = router.plan(mode, speaker)
+    turn_deadline = time.monotonic() + TURN_DEADLINE
+
+    delivered = []
+    if stream and on_delta is not None:
+        forward_delta = on_delta
+
+        def on_delta(delta):
+            delivered.append(True)
+            forward_delta(delta)
+
+    for index, entry in enumerate(route):
+        payload["model"] = entry["model"]
+        if metrics is not None:
+            metrics.set(model=entry["model"], failovers=index)
+        started = time.monotonic()
+        reserve = route[index + 1]["slo"] if index + 1 < len(route) else 0.0
+        deadline = max(turn_deadline - reserve, min(turn_deadline, started + entry["slo"]))
+        can_fail_over = index + 1 < len(route) and turn_deadline - time.monotonic() > 1.0
+        try:
+            status_code, resp_json = post_chat_completion(payload, stream, on_delta, on_reasoning, label,
+                                                          max_reasoning_tokens, metrics, deadline)
+        except _requests().exceptions.RequestException as e:
+            router.record(entry["model"], mode, None)
+            if delivered or not can_fail_over:
+                raise
+            reason = type(e).__name__
+        else:
+            if status_code == 200:
+                router.record(entry["model"], mode, time.monotonic() - started)
+                return status_code, resp_json
+            if status_code == 429:
+                # Our quota, not the model: neither a latency sample nor a reason to switch models
+                return status_code, resp_json
+            router.record(entry["model"], mode, None)
+            if delivered or not can_fail_over or not (is_breaker_failure_status(status_code) or status_code == 404):
+                return status_code, resp_json
+            reason = f"status {status_code}"
+        log_info(f"Debug: {label} failed on {entry['model']} ({reason}), failing over to {route[index + 1]['model']}")
+
+# Pre-generated topic pool shared by every process (topics.json in the cache directory):
+# topics are served instantly from the pool and refilled in batches in the background
+TOPIC_POOL_LOW_WATER = int(os.getenv("GMI_TOPIC_POOL_LOW_WATER", "5"))
+TOPIC_POOL_BATCH = int(os.getenv("GMI_TOPIC_POOL_BATCH", "8"))
+TOPIC_POOL_MAX_BATCHES = 3  # per refill, so a model that keeps repeating itself cannot loop forever
+TOPIC_POOL_SERVED_HISTORY = 200
+TOPIC_REFILL_LEASE = TURN_DEADLINE + 15  # renewed before each batch; a refill silent for longer is presumed dead
+TOPIC_SUBJECTS = [
+    "technology and society", "environmental challenges", "economic systems", "human rights and freedoms",
+    "scientific advancement", "education and learning", "healthcare and medicine", "space and exploration",
+    "privacy and security", "innovation and progress",
+]
+
+# Set when running as a one-shot CLI process, where a background thread would die with the process
+_run_once = False
+
+def normalize_topic(topic):
+    """Order-insensitive key so "The Ethics of AI" and "AI Ethics" count as the same topic"""
+    return " ".join(sorted(set(tokenize(topic))))
+
+def parse_topic_lines(text):
+    """Extract one topic per line from a batch completion, dropping numbering, bullets and quotes"""
+    topics = []
+    for line in text.splitlines():
+        line = re.sub(r"^\s*(?:[-*\u2022]|\d+[.)])\s*", "", line).strip().strip('"').strip("'").strip()
+        if len(line) > 5 and 2 <= len(line.split()) <= 15 and not line.endswith(":") and line.lower() != "none":
+            topics.append(line)
+    return topics
+
+class TopicPool:
+    """Unserved pre-generated topics plus the history of served ones, in a locked shared file
+
+    add() drops topics whose normalized text matches one already pooled or
+    recently served, so the pool never hands out near-duplicates. A refill lease
+    in the same file keeps concurrent processes from generating batches at once.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+
+    def _update(self, change):
+        with FileLock(self.lock_path):
+            state = read_json_file(self.path, {})
+            state.setdefault("available", [])
+            state.setdefault("served", [])
+            result = change(state, time.time())
+            write_json_file(self.path, state)
+        return result
+
+    def take(self):
+        """Pop the oldest unserved topic; returns (topic or None, topics left)"""
+        def pop(state, now):
+            if not state["available"]:
+                return None, 0
+            entry = state["available"].pop(0)
+            self._mark_served(state, entry["topic"], now)
+            return entry["topic"], len(state["available"])
+        return self._update(pop)
+
+    def _mark_served(self, state, topic, now):
+        state["served"] = state["served"][-(TOPIC_POOL_SERVED_HISTORY - 1):] + [
+            {"topic": topic, "key": normalize_topic(topic), "served_at": round(now, 3)}]
+
+    def mark_served(self, topic):
+        """Record a topic served from outside the pool (live or fallback) so batches skip it"""
+        self._update(lambda state, now: self._mark_served(state, topic, now))
+
+    def add(self, topics):
+        """Add new topics, skipping near-duplicates; returns the number added"""
+        def extend(state, now):
+            seen = {entry["key"] for entry in state["available"] + state["served"]}
+            added = 0
+            for topic in topics:
+                key = normalize_topic(topic)
+                if key and key not in seen:
+                    seen.add(key)
+                    state["available"].append({"topic": topic, "key": key, "created": round(now, 3)})
+                    added += 1
+            return added
+        return self._update(extend)
+
+    def served_keys(self):
+        return {entry["key"] for entry in read_json_file(self.path, {}).get("served", [])}
+
+    def refilling(self):
+        return read_json_file(self.path, {}).get("refilling_until", 0) > time.time()
+
+    def claim_refill(self):
+        """Take the refill lease; returns its owner token, or None if another refill is already running"""
+        token = f"{os.getpid()}-{os.urandom(4).hex()}"
+
+        def claim(state, now):
+            if state.get("refilling_until", 0) > now:
+                return None
+            state["refilling_until"] = now + TOPIC_REFILL_LEASE
+            state["refill_owner"] = token
+            return token
+        return self._update(claim)
+
+    def renew_refill(self, token):
+        """Extend the lease for another batch; returns False if it expired and another refill took it"""
+        def renew(state, now):
+            if state.get("refill_owner") != token:
+                return False
+            state["refilling_until"] = now + TOPIC_REFILL_LEASE
+            return True
+        return self._update(renew)
+
+    def release_refill(self, token):
+        """Drop the lease, unless it has since passed to another refill"""
+        def release(state, now):
+            if state.get("refill_owner") == token:
+                state.pop("refilling_until", None)
+                state.pop("refill_owner", None)
+        self._update(release)
 
-# Debug: Print API key status (to stderr to avoid polluting output)
-if API_KEY:
-    print(f"Debug: API key loaded successfully (length: {len(API_KEY)})", file=sys.stderr)
-    print(f"Debug: API key starts with: {API_KEY[:10]}...", file=sys.stderr)
-else:
-    print("Debug: No API key found in environment variables", file=sys.stderr)
-    print("Debug: Available env vars:", [k for k in os.environ.keys() if 'API' in k or 'GMI' in k], file=sys.stderr)
+    def stats(self):
+        state = read_json_file(self.path, {})
+        return {"available": len(state.get("available", [])), "served": len(state.get("served", [])),
+                "low_water": TOPIC_POOL_LOW_WATER, "refilling": state.get("refilling_until", 0) > time.time()}
 
-def test_api_connection():
-    """Test the API connection and return detailed error information"""
-    if not API_KEY:
-        return "No API key available"
-    
-    url = "https://api.gmi-serving.com/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
-    }
-    
+_topic_pool = None
+
+def get_topic_pool():
+    """Return the process-wide topic pool backed by the shared topics file"""
+    global _topic_pool
+    if _topic_pool is None:
+        _topic_pool = TopicPool(get_cache_path("topics.json"))
+    return _topic_pool
+
+def generate_topic_batch(count):
+    """Ask the API for `count` distinct topics in one request; returns a list (empty on failure)"""
+    import random
+
+    if not API_KEY or len(API_KEY.strip()) < 10 or not get_circuit_breaker().allow_request():
+        return []
+    subjects = random.sample(TOPIC_SUBJECTS, min(len(TOPIC_SUBJECTS), max(1, count)))
+    topic_budget = get_mode_budget("topic")
     payload = {
-        "model": "deepseek-ai/DeepSeek-R1-0528",
-        "messages": [{"role": "user", "content": "Hello"}],
-        "max_tokens": 10
+        "model": get_model_route("topic")[0]["model"],
+        "messages": [
+            {
+                "role": "system",
+                "content": (f"Generate {count} distinct debate topics (5-10 words each). "
+                            "Return ONLY the topics, one per line, with no numbering or commentary.")
+            },
+            {"role": "user", "content": f"Cover a mix of: {', '.join(subjects)}"}
+        ],
+        "temperature": 0.9,
+        "max_tokens": topic_budget["max_tokens"] + 32 * count,
+        "stream": False
     }
-    
+    metrics = RequestMetrics("topic_batch", "topic")
+    metrics.set(model=payload["model"])
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
-        if response.status_code == 200:
-            return "API connection successful"
-        else:
-            return f"API returned status {response.status_code}: {response.text[:200]}"
-    except requests.exceptions.Timeout:
-        return "API timeout"
-    except requests.exceptions.ConnectionError:
-        return "API connection error"
+        status_code, resp_json = post_routed_completion(payload, "topic", label="TOPIC BATCH", metrics=metrics)
+        if status_code != 200 or not resp_json.get("choices"):
+            metrics.set(fallback="HTTP_ERROR")
+            print(f"Error: Topic batch request returned status {status_code}", file=sys.stderr)
+            return []
+        choice = resp_json["choices"][0]
+        return parse_topic_lines(extract_answer_text(choice.get("message", {}), choice.get("finish_reason")))
     except Exception as e:
-        return f"API test error: {str(e)}"
+        metrics.set(fallback="UNEXPECTED_ERROR")
+        print(f"Error: Topic batch generation failed: {str(e)}", file=sys.stderr)
+        return []
+    finally:
+        metrics.finish()
 
-# Test API connection on startup
-print(f"Debug: API test result: {test_api_connection()}", file=sys.stderr)
+def refill_topic_pool():
+    """Generate batches until the pool is a batch above the low-water mark; returns topics added"""
+    pool = get_topic_pool()
+    token = pool.claim_refill()
+    if not token:
+        return 0
+    added = 0
+    try:
+        for _ in range(TOPIC_POOL_MAX_BATCHES):
+            if pool.stats()["available"] >= TOPIC_POOL_LOW_WATER + TOPIC_POOL_BATCH:
+                break
+            if not pool.renew_refill(token):
+                log_info("Debug: Topic refill lease expired and was taken over, stopping")
+                break
+            topics = generate_topic_batch(TOPIC_POOL_BATCH)
+            if not topics:
+                break
+            added += pool.add(topics)
+        log_debug(f"Debug: Topic pool refilled with {added} topics ({pool.stats()['available']} available)")
+    finally:
+        pool.release_refill(token)
+    return added
 
-def load_speaker_configs():
-    """Load speaker configurations from speakers.json"""
-    # Try multiple possible paths for speakers.json
-    possible_paths = [
-        'speakers.json',  # Current directory
-        '../speakers.json',  # Parent directory
-        '../../speakers.json',  # Grandparent directory
-        os.path.join(os.path.dirname(__file__), 'speakers.json'),  # Same directory as script
-        os.path.join(os.path.dirname(__file__), '..', 'speakers.json'),  # Parent of script directory
-    ]
-    
-    for path in possible_paths:
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                print(f"Debug: Successfully loaded speakers.json from {path}", file=sys.stderr)
-                return {speaker['name']: speaker for speaker in data['speakers']}
-        except FileNotFoundError:
-            continue
-        except json.JSONDecodeError:
-            print(f"Error: Invalid JSON in {path}", file=sys.stderr)
-            continue
-    
-    print("Error: speakers.json not found in any of the expected locations", file=sys.stderr)
-    print("Searched paths:", possible_paths, file=sys.stderr)
-    return {}
+def schedule_topic_refill():
+    """Refill the pool without blocking: a thread in long-lived processes, a detached process from the CLI"""
+    if not API_KEY or len(API_KEY.strip()) < 10 or get_response_cache().offline or get_topic_pool().refilling():
+        return
+    if not _run_once:
+        threading.Thread(target=refill_topic_pool, name="topic-refill", daemon=True).start()
+        return
+    import subprocess
+    options = {"creationflags": 0x00000008 | 0x00000200} if os.name == "nt" else {"start_new_session": True}  # DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), "--refill-topics"],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     cwd=os.path.dirname(os.path.abspath(__file__)), **options)
+
+def generate_topic(emit=print):
+    """Serve a debate topic from the pre-generated pool, generating one live if the pool is empty"""
+    metrics = RequestMetrics("topic", "topic")
+    try:
+        topic, remaining = get_topic_pool().take()
+        if remaining < TOPIC_POOL_LOW_WATER:
+            schedule_topic_refill()
+        if topic:
+            log_debug(f"Debug: Topic served from pool ({remaining} left)")
+            metrics.set(source="pool")
+            emit(topic)
+        else:
+            _generate_topic(emit, metrics)
+    finally:
+        metrics.finish()
+
+def _generate_topic(emit, metrics):
+    import random
+    random.seed()
 
-def generate_topic():
-    """Generate a debate topic using GMI API"""
     # Fallback topics for when API fails
     fallback_topics = [
         "The Ethics of Artificial Intelligence",
@@ -107,21 +2110,20 @@ def generate_topic():
         "Urban Development vs. Environmental Protection"
     ]
     
+    def use_fallback_topic(reason, detail):
+        served = get_topic_pool().served_keys()
+        topic = random.choice([t for t in fallback_topics if normalize_topic(t) not in served] or fallback_topics)
+        log_debug(f"Debug: {detail}, using fallback topic: {topic}")
+        metrics.set(fallback=reason)
+        get_topic_pool().mark_served(topic)
+        emit(topic)
+
     # If no API key, use fallback
     if not API_KEY:
-        import random
-        random.seed()
-        topic = random.choice(fallback_topics)
-        print(f"Debug: No API key available, using fallback topic: {topic}", file=sys.stderr)
-        print(topic)
+        log_api_key_status()
+        use_fallback_topic("NO_API_KEY", "No API key available")
         return
     
-    url = "https://api.gmi-serving.com/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
-    }
-
     # More varied prompts for topic generation
     topic_prompts = [
         "Generate a debate topic about technology and society",
@@ -136,12 +2138,11 @@ def generate_topic():
         "Create a debate topic about innovation and progress"
     ]
     
-    import random
-    random.seed()
     selected_prompt = random.choice(topic_prompts)
 
+    topic_budget = get_mode_budget("topic")
     payload = {
-        "model": "deepseek-ai/DeepSeek-R1-0528",
+        "model": get_model_route("topic")[0]["model"],
         "messages": [
             {
                 "role": "system", 
@@ -153,279 +2154,455 @@ def generate_topic():
             }
         ],
         "temperature": 0.9,
-        "stream": "false"
+        "max_tokens": topic_budget["max_tokens"],
+        "stream": False
     }
+    metrics.set(model=payload["model"])
+
+    cache = get_response_cache()
+    cache_key = cache.key_for(payload)
+    cached_json = cache.get(cache_key) if cache_key else None
+    metrics.set_cache_status(cache, cache_key, cached_json)
 
     try:
-        # Check if API key is valid
-        if not API_KEY or len(API_KEY.strip()) < 10:
-            topic = random.choice(fallback_topics)
-            print(f"Debug: Invalid or missing API key (length: {len(API_KEY) if API_KEY else 0}), using fallback topic: {topic}", file=sys.stderr)
-            print(topic)
+        if cached_json is not None:
+            log_debug(f"Debug: Topic served from response cache ({cache_key[:12]})")
+            status_code, resp_json = 200, cached_json
+        elif cache.offline:
+            use_fallback_topic("CACHE_MISS", "Response cache miss in replay mode")
             return
-            
-        # Log request details to stderr (for audience debug)
-        print(f"🔍 TOPIC GENERATION REQUEST DEBUG:", file=sys.stderr)
-        print(f"URL: {url}", file=sys.stderr)
-        print(f"Headers: {json.dumps(headers, separators=(',', ':'))}", file=sys.stderr)
-        print(f"Payload: {json.dumps(payload, separators=(',', ':'))}", file=sys.stderr)
-        print(f"API Key (first 20 chars): {API_KEY[:20]}...", file=sys.stderr)
-        
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
-        
-        # Log response details to stderr (for audience debug)
-        print(f"🔍 TOPIC GENERATION RESPONSE DEBUG:", file=sys.stderr)
-        print(f"Status Code: {response.status_code}", file=sys.stderr)
-        print(f"Response Headers: {json.dumps(dict(response.headers), separators=(',', ':'))}", file=sys.stderr)
-        print(f"Response Text: {response.text[:1000]}", file=sys.stderr)
-        
-        print(f"Debug: Topic Generation Response status: {response.status_code}", file=sys.stderr)
-        
-        try:
-            resp_json = response.json()
-            print(f"Debug: Topic Generation Response: {json.dumps(resp_json, indent=2)}", file=sys.stderr)
-        except json.JSONDecodeError as e:
-            topic = random.choice(fallback_topics)
-            print(f"Debug: Failed to parse JSON response: {str(e)}, using fallback topic: {topic}", file=sys.stderr)
-            print(topic)
+        elif not API_KEY or len(API_KEY.strip()) < 10:
+            # Check if API key is valid
+            log_api_key_status()
+            use_fallback_topic("INVALID_API_KEY", f"Invalid or missing API key (length: {len(API_KEY) if API_KEY else 0})")
             return
+        elif not get_circuit_breaker().allow_request():
+            use_fallback_topic("CIRCUIT_OPEN", "Circuit breaker is open")
+            return
+        else:
+            try:
+                status_code, resp_json = post_routed_completion(payload, "topic", label="TOPIC GENERATION",
+                                                                metrics=metrics)
+            except json.JSONDecodeError as e:
+                use_fallback_topic("INVALID_JSON", f"Failed to parse JSON response: {str(e)}")
+                return
+            log_debug(f"Debug: Topic Generation Response status: {status_code}")
+            if status_code == 200 and cache_key and is_cacheable_completion(resp_json):
+                # Keyed by the model that answered, so a failover answer never passes for the primary's
+                cache.put(cache.key_for(payload), resp_json)
         
-        if response.status_code == 200 and "choices" in resp_json and resp_json["choices"]:
+        if status_code == 200 and "choices" in resp_json and resp_json["choices"]:
             choice = resp_json["choices"][0]
             message = choice.get("message", {})
             
             # Check for content first, then reasoning_content as fallback
-            result = message.get("content", "")
-            if not result and "reasoning_content" in message:
-                # Extract the final response from reasoning_content
-                reasoning = message.get("reasoning_content", "")
-                # Try to find the actual response in the reasoning
-                lines = reasoning.split('\n')
-                for line in reversed(lines):  # Start from the end
-                    line = line.strip()
-                    if line and not line.startswith('Okay,') and not line.startswith('Hmm') and not line.startswith('I need') and not line.startswith('Key points:') and not line.startswith('Remember,') and not line.startswith('As') and not line.startswith('The tension') and not line.startswith('I recall') and not line.startswith('Right,') and not line.startswith('But since') and not line.startswith('We are discussing'):
-                        # This looks like the actual response
-                        result = line
-                        break
-                
-                if not result:
-                    # If we can't extract from reasoning, use the last meaningful line
-                    for line in reversed(lines):
-                        line = line.strip()
-                        if line and len(line) > 20:  # Reasonable length for a response
-                            result = line
-                            break
+            result = extract_answer_text(message, choice.get("finish_reason"))
             
             # Clean up the result - remove quotes, extra formatting
             result = result.strip('"').strip("'").strip()
             if result and result.lower() != "none" and len(result) > 5:
-                print(result)
+                get_topic_pool().mark_served(result)
+                emit(result)
             else:
                 # Use fallback if API returns invalid content
-                topic = random.choice(fallback_topics)
-                print(f"Debug: API returned invalid content, using fallback topic: {topic}", file=sys.stderr)
-                print(topic)
+                use_fallback_topic("INVALID_CONTENT", "API returned invalid content")
         else:
             # Use fallback if API response is invalid
             error_msg = resp_json.get('error', {}).get('message', 'Unknown error') if isinstance(resp_json, dict) else 'Unknown error'
-            topic = random.choice(fallback_topics)
-            print(f"Debug: Invalid API response (status {response.status_code}: {error_msg}), using fallback topic: {topic}", file=sys.stderr)
-            print(topic)
-    except requests.exceptions.Timeout:
-        topic = random.choice(fallback_topics)
-        print(f"Debug: API timeout, using fallback topic: {topic}", file=sys.stderr)
-        print(topic)
-    except requests.exceptions.ConnectionError:
-        topic = random.choice(fallback_topics)
-        print(f"Debug: API connection error, using fallback topic: {topic}", file=sys.stderr)
-        print(topic)
+            use_fallback_topic("HTTP_ERROR", f"Invalid API response (status {status_code}: {error_msg})")
+    except RateLimitTimeout as e:
+        use_fallback_topic("RATE_LIMITED", str(e))
+    except _requests().exceptions.Timeout:
+        use_fallback_topic("TIMEOUT", "API timeout")
+    except _requests().exceptions.ConnectionError:
+        use_fallback_topic("NETWORK_ERROR", "API connection error")
     except Exception as e:
-        topic = random.choice(fallback_topics)
-        print(f"Debug: Unexpected error in topic generation: {str(e)}, using fallback topic: {topic}", file=sys.stderr)
-        print(topic)
+        use_fallback_topic("UNEXPECTED_ERROR", f"Unexpected error in topic generation: {str(e)}")
+
+# Offline fallback quotes: a per-speaker corpus in quotes.json, ranked against the topic,
+# question and recent turns with BM25 over a binary index memory-mapped from the cache directory
+QUOTES_FILE = os.getenv("BRIGHT_MINDS_QUOTES_FILE")
+DEFAULT_FALLBACK_QUOTE = "I have important thoughts on this matter that deserve consideration."
+QUOTE_INDEX_MAGIC = b"BMQIDX01"
+QUOTE_INDEX_HEADER = "<8sqqIIII"  # magic, source mtime_ns, source size, speakers, docs, terms, postings
+QUOTE_INDEX_SPEAKER = "<IIII"  # name offset, name length, first doc, doc count
+QUOTE_INDEX_DOC = "<II"  # text offset, text length
+QUOTE_INDEX_TERM = "<IIII"  # term offset, term length, first posting, posting count
+QUOTE_INDEX_POSTING = "<If"  # doc, BM25 weight
+BM25_K1 = 1.2
+BM25_B = 0.75
+QUERY_WEIGHTS = {"topic": 1.0, "question": 1.5, "context": 0.5}
+STOPWORDS = frozenset("""a about after all also an and any are as at be been but by can could do does for from
+had has have how i if in into is it its just like may me might more most must my no not now of on one only or
+our out over should so some such than that the their them then there these they this those to too up us very
+was we were what when where which while who why will with would you your""".split())
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords, with plural and -ing/-ed endings stripped"""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        for suffix in ("ing", "ed", "es", "s"):
+            if len(word) > len(suffix) + 3 and word.endswith(suffix):
+                word = word[:-len(suffix)]
+                break
+        tokens.append(word)
+    return tokens
+
+def build_quote_index(corpus, fingerprint=(0, 0)):
+    """Serialize {speaker: [quote, ...]} into the binary layout read by QuoteIndex
+
+    Postings store precomputed BM25 term weights, so a lookup is a binary search
+    per query term and a sum; fingerprint is the source file's (mtime_ns, size).
+    """
+    import math
+    import struct
+    from collections import Counter
+
+    speakers = sorted(corpus)
+    docs = [quote for speaker in speakers for quote in corpus[speaker]]
+    term_counts = [Counter(tokenize(quote)) for quote in docs]
+    lengths = [sum(counts.values()) for counts in term_counts]
+    avg_length = sum(lengths) / len(lengths) if lengths else 1.0
+
+    postings = {}
+    for doc_id, counts in enumerate(term_counts):
+        for term, tf in counts.items():
+            postings.setdefault(term.encode('utf-8'), []).append((doc_id, tf))
+
+    strings = bytearray()
+
+    def add_string(text):
+        data = text.encode('utf-8') if isinstance(text, str) else text
+        strings.extend(data)
+        return len(strings) - len(data), len(data)
+
+    speaker_table, doc_table, term_table, posting_table = bytearray(), bytearray(), bytearray(), bytearray()
+    first_doc = 0
+    for speaker in speakers:
+        speaker_table += struct.pack(QUOTE_INDEX_SPEAKER, *add_string(speaker), first_doc, len(corpus[speaker]))
+        first_doc += len(corpus[speaker])
+    for quote in docs:
+        doc_table += struct.pack(QUOTE_INDEX_DOC, *add_string(quote))
+    n_postings = 0
+    for term in sorted(postings):
+        entries = postings[term]
+        idf = math.log(1 + (len(docs) - len(entries) + 0.5) / (len(entries) + 0.5))
+        term_table += struct.pack(QUOTE_INDEX_TERM, *add_string(term), n_postings, len(entries))
+        for doc_id, tf in entries:
+            norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / avg_length)
+            posting_table += struct.pack(QUOTE_INDEX_POSTING, doc_id, idf * tf * (BM25_K1 + 1) / norm)
+        n_postings += len(entries)
+
+    header = struct.pack(QUOTE_INDEX_HEADER, QUOTE_INDEX_MAGIC, fingerprint[0], fingerprint[1],
+                         len(speakers), len(docs), len(postings), n_postings)
+    return bytes(header + speaker_table + doc_table + term_table + posting_table + strings)
+
+class QuoteIndex:
+    """Read-only view of a binary quote index; opening it maps the file without parsing it
+
+    Sections after the header: speakers (doc range per speaker, docs grouped by
+    speaker), docs (quote text), terms sorted by UTF-8 bytes (postings range),
+    postings (doc, BM25 weight), then one blob holding every string.
+    """
+
+    def __init__(self, data):
+        import struct
+        self._struct = struct
+        self.data = data
+        (magic, self.mtime_ns, self.size, n_speakers, n_docs,
+         self.n_terms, n_postings) = struct.unpack_from(QUOTE_INDEX_HEADER, data, 0)
+        if magic != QUOTE_INDEX_MAGIC:
+            raise ValueError("Not a quote index")
+        self.speakers_at = struct.calcsize(QUOTE_INDEX_HEADER)
+        self.docs_at = self.speakers_at + n_speakers * struct.calcsize(QUOTE_INDEX_SPEAKER)
+        self.terms_at = self.docs_at + n_docs * struct.calcsize(QUOTE_INDEX_DOC)
+        self.postings_at = self.terms_at + self.n_terms * struct.calcsize(QUOTE_INDEX_TERM)
+        self.strings_at = self.postings_at + n_postings * struct.calcsize(QUOTE_INDEX_POSTING)
+        self.speakers = {}
+        for i in range(n_speakers):
+            offset, length, first_doc, count = struct.unpack_from(
+                QUOTE_INDEX_SPEAKER, data, self.speakers_at + i * struct.calcsize(QUOTE_INDEX_SPEAKER))
+            self.speakers[self._string(offset, length).decode('utf-8')] = (first_doc, count)
+
+    @classmethod
+    def open(cls, path):
+        import mmap
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def close(self):
+        if hasattr(self.data, "close"):
+            self.data.close()
+
+    def _string(self, offset, length):
+        return self.data[self.strings_at + offset:self.strings_at + offset + length]
+
+    def quote(self, doc_id):
+        offset, length = self._struct.unpack_from(
+            QUOTE_INDEX_DOC, self.data, self.docs_at + doc_id * self._struct.calcsize(QUOTE_INDEX_DOC))
+        return self._string(offset, length).decode('utf-8')
+
+    def postings(self, term):
+        """Return [(doc, weight), ...] for a token, by binary search over the sorted term table"""
+        key = term.encode('utf-8')
+        entry_size = self._struct.calcsize(QUOTE_INDEX_TERM)
+        low, high = 0, self.n_terms
+        while low < high:
+            middle = (low + high) // 2
+            offset, length, first, count = self._struct.unpack_from(
+                QUOTE_INDEX_TERM, self.data, self.terms_at + middle * entry_size)
+            candidate = self._string(offset, length)
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                posting_size = self._struct.calcsize(QUOTE_INDEX_POSTING)
+                start = self.postings_at + first * posting_size
+                return [self._struct.unpack_from(QUOTE_INDEX_POSTING, self.data, start + i * posting_size)
+                        for i in range(count)]
+        return []
+
+    def search(self, speaker, query):
+        """Score every quote of a speaker against {token: weight}; returns [(score, doc), ...] best first"""
+        first_doc, count = self.speakers.get(speaker, (0, 0))
+        scores = dict.fromkeys(range(first_doc, first_doc + count), 0.0)
+        for term, weight in query.items():
+            for doc_id, term_weight in self.postings(term):
+                if doc_id in scores:
+                    scores[doc_id] += weight * term_weight
+        return sorted(((score, doc_id) for doc_id, score in scores.items()), key=lambda item: (-item[0], item[1]))
+
+_quote_index = None
+_quote_index_lock = threading.Lock()
+
+def load_quote_corpus(path):
+    """Read quotes.json into {speaker: [quote, ...]}, skipping empty entries"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    corpus = {name: [q for q in quotes if isinstance(q, str) and q.strip()]
+              for name, quotes in data.get("speakers", {}).items()}
+    return {name: quotes for name, quotes in corpus.items() if quotes}
+
+def get_quote_index(rebuild=False):
+    """Return the QuoteIndex for quotes.json, rebuilding the cached index file if the corpus changed"""
+    global _quote_index
+    source = find_data_file('quotes.json', QUOTES_FILE)
+    if source is None:
+        return None
+    stat = os.stat(source)
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+    with _quote_index_lock:
+        if not rebuild and _quote_index is not None and (_quote_index.mtime_ns, _quote_index.size) == fingerprint:
+            return _quote_index
+        index_path = get_cache_path(f"quotes-{hashlib.sha1(source.encode('utf-8')).hexdigest()[:10]}.idx")
+        index = None
+        if not rebuild:
+            try:
+                index = QuoteIndex.open(index_path)
+                if (index.mtime_ns, index.size) != fingerprint:
+                    index.close()
+                    index = None
+            except (OSError, ValueError):
+                index = None
+        if index is None:
+            try:
+                corpus = load_quote_corpus(source)
+            except (OSError, ValueError) as e:
+                print(f"Error: Could not load quotes from {source}: {str(e)}", file=sys.stderr)
+                return None
+            data = build_quote_index(corpus, fingerprint)
+            tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, index_path)
+                index = QuoteIndex.open(index_path)
+                log_debug(f"Debug: Built quote index {index_path} ({len(data)} bytes)")
+            except OSError:
+                index = QuoteIndex(data)  # e.g. the old index is still mapped by another process on Windows
+        if _quote_index is not None:
+            _quote_index.close()
+        _quote_index = index
+        return index
+
+def pick_fallback_quote(speaker_name, topic, context="", user_question=""):
+    """Return the speaker's quote most relevant to the topic, question and latest turns
+
+    Quotes that already appear in the debate context are skipped so a degraded
+    debate does not repeat itself; ties (e.g. no word overlap at all) are broken
+    by a stable hash of the topic and turn count rather than process-randomized hash().
+    """
+    index = get_quote_index()
+    if index is None or speaker_name not in index.speakers:
+        return DEFAULT_FALLBACK_QUOTE
+
+    query = {}
+    turns = split_context_turns(context) if context else []
+    for part, text in (("topic", topic), ("question", user_question), ("context", "\n".join(turns[-2:]))):
+        for term in tokenize(text or ""):
+            query[term] = query.get(term, 0.0) + QUERY_WEIGHTS[part]
+
+    ranked = index.search(speaker_name, query)
+    fresh = [(score, doc_id) for score, doc_id in ranked if index.quote(doc_id) not in context]
+    candidates = fresh or ranked
+    ties = [doc_id for score, doc_id in candidates if score == candidates[0][0]]
+    digest = hashlib.sha1(f"{speaker_name}\x00{topic}\x00{len(turns)}".encode('utf-8')).digest()
+    return index.quote(ties[int.from_bytes(digest[:4], "big") % len(ties)])
+
+def send_query(speaker_name, topic, context="", user_question="", is_debate_continuation=False, emit=print,
+               stream=False, on_delta=None, on_reasoning=None):
+    """Send a query to GMI API with speaker-specific prompting
 
-def send_query(speaker_name, topic, context="", user_question="", is_debate_continuation=False):
-    """Send a query to GMI API with speaker-specific prompting"""
+    With stream=True the completion is read as server-sent events: answer deltas go to
+    on_delta (default: STREAM_DELTA:<json string> lines via emit) and reasoning deltas to
+    on_reasoning (default: REASONING_DELTA: lines on stderr). STREAM_END is emitted once
+    the stream finishes, followed by the final answer exactly as in non-streaming mode.
+    Every request that fails (before, during or after the stream) is closed with
+    STREAM_END too, so the API_FAILED: lines always come after it.
+    Returns the request's metrics fields (timings, token counts, fallback reason).
+    """
     
-    print(f"Debug: send_query called with speaker='{speaker_name}', topic='{topic}', context='{context[:50]}...', user_question='{user_question}', is_debate_continuation={is_debate_continuation}", file=sys.stderr)
+    log_debug(f"Debug: send_query called with speaker='{speaker_name}', topic='{topic}', context='{context[:50]}...', user_question='{user_question}', is_debate_continuation={is_debate_continuation}")
     
     # Handle topic generation
     if speaker_name == "topic_generator":
-        generate_topic()
+        generate_topic(emit)
         return
+
+    metrics = RequestMetrics("query", request_mode(user_question, is_debate_continuation), speaker_name)
+    try:
+        _send_query(speaker_name, topic, context, user_question, is_debate_continuation,
+                    metrics.watch(emit), stream, on_delta, on_reasoning, metrics)
+    finally:
+        metrics.finish()
+    return metrics.fields
+
+def end_stream_before_failure(emit):
+    """Wrap a streaming emit so STREAM_END is sent exactly once, ahead of any API_FAILED: line"""
+    ended = False
+
+    def wrapped(line):
+        nonlocal ended
+        if line == "STREAM_END":
+            if ended:
+                return
+            ended = True
+        elif not ended and str(line).startswith("API_FAILED:"):
+            ended = True
+            emit("STREAM_END")
+        emit(line)
+    return wrapped
+
+def _send_query(speaker_name, topic, context, user_question, is_debate_continuation, emit,
+                stream, on_delta, on_reasoning, metrics):
+    # Look up the speaker configuration
+    registry = get_speaker_registry()
+    speaker = registry.get(speaker_name)
     
-    # Load speaker configurations
-    speakers = load_speaker_configs()
-    
-    if speaker_name not in speakers:
+    if speaker is None:
         print(f"Error: Speaker '{speaker_name}' not found in configuration", file=sys.stderr)
-        print(f"Debug: Available speakers: {list(speakers.keys())}", file=sys.stderr)
+        log_debug(f"Debug: Available speakers: {registry.names()}")
         return
     
     # Generate fallback response if API fails
     def generate_fallback_response():
-        # More varied and context-aware fallback responses
-        fallback_responses = {
-            "Elon Musk": [
-                "The future is not something we wait for, it's something we create. We need to think big and act boldly.",
-                "Innovation requires taking risks and challenging the status quo. That's how we move humanity forward.",
-                "Technology should serve humanity, not the other way around. We must be thoughtful about its development.",
-                "We're at a critical juncture where our decisions today will shape the next century. Let's be bold.",
-                "The status quo is not an option. We need revolutionary thinking to solve our biggest challenges.",
-                "Progress comes from questioning everything and being willing to fail spectacularly.",
-                "The best way to predict the future is to build it ourselves. Let's get to work.",
-                "We need to think in terms of exponential growth, not linear progress.",
-                "The most important thing is to have a vision and execute it relentlessly."
-            ],
-            "Steve Jobs": [
-                "Design is not just what it looks like and feels like. Design is how it works.",
-                "Innovation distinguishes between a leader and a follower. We must think differently.",
-                "The best way to predict the future is to invent it. Let's create something amazing.",
-                "Quality is more important than quantity. One home run is much better than two doubles.",
-                "Stay hungry, stay foolish. That's how we keep pushing boundaries.",
-                "The intersection of technology and liberal arts is where magic happens.",
-                "We're here to put a dent in the universe. Otherwise why else even be here?",
-                "Simple can be harder than complex. You have to work hard to get your thinking clean.",
-                "Your work is going to fill a large part of your life. Make sure it's something you love."
-            ],
-            "Albert Einstein": [
-                "Imagination is more important than knowledge. Knowledge is limited, imagination encircles the world.",
-                "The important thing is not to stop questioning. Curiosity has its own reason for existence.",
-                "We cannot solve our problems with the same thinking we used when we created them.",
-                "The most incomprehensible thing about the world is that it is comprehensible.",
-                "Logic will get you from A to B. Imagination will take you everywhere.",
-                "The true sign of intelligence is not knowledge but imagination.",
-                "In the middle of difficulty lies opportunity. We must embrace uncertainty.",
-                "The world is a dangerous place, not because of those who do evil, but because of those who look on and do nothing.",
-                "Peace cannot be kept by force; it can only be achieved by understanding."
-            ],
-            "Marie Curie": [
-                "Nothing in life is to be feared, it is only to be understood. Now is the time to understand more.",
-                "Be less curious about people and more curious about ideas. That's where true progress lies.",
-                "I am among those who think that science has great beauty. It brings us closer to truth.",
-                "The way of progress is neither swift nor easy. We must be patient and persistent.",
-                "I have no dress except the one I wear every day. If you are going to be kind enough to give me one, please let it be practical and dark so that I can put it on afterwards to go to the laboratory.",
-                "One never notices what has been done; one can only see what remains to be done.",
-                "I believe that science has great beauty. A scientist in his laboratory is not only a technician: he is also a child placed before natural phenomena which impress him like a fairy tale.",
-                "The future belongs to those who believe in the beauty of their dreams.",
-                "We must have perseverance and above all confidence in ourselves."
-            ],
-            "Nikola Tesla": [
-                "The present is theirs; the future, for which I really worked, is mine. Let's build the future together.",
-                "The scientists of today think deeply instead of clearly. We need both depth and clarity.",
-                "Invention is the most important product of man's creative brain. Let's invent the impossible.",
-                "The day science begins to study non-physical phenomena, it will make more progress in one decade than in all the previous centuries of its existence.",
-                "I don't care that they stole my idea. I care that they don't have any of their own.",
-                "The spread of civilization may be likened to a fire; first, a feeble spark, next a flickering flame, then a mighty blaze, ever increasing in speed and power.",
-                "Let the future tell the truth, and evaluate each one according to his work and accomplishments.",
-                "The present is theirs; the future, for which I really worked, is mine.",
-                "The scientists of today think deeply instead of clearly. One must be sane to think clearly, but one can think deeply and be quite insane."
-            ],
-            "Ada Lovelace": [
-                "The Analytical Engine weaves algebraic patterns just as the Jacquard loom weaves flowers and leaves.",
-                "Imagination is the Discovering Faculty, pre-eminently. It is that which penetrates into the unseen worlds.",
-                "The more I study, the more insatiable do I feel my genius for it to be. Knowledge is power.",
-                "The science of operations, as derived from mathematics more especially, is a science of itself, and has its own abstract truth and value.",
-                "I want to put in something about Bernoulli's numbers, in one of my notes, as an example of how the implicit function may be worked out by the engine, without having been worked out by human head and hands first.",
-                "The Analytical Engine has no pretensions whatever to originate anything. It can do whatever we know how to order it to perform.",
-                "I am much pleased to find how very well I stand work and how my powers of attention and continued effort increase.",
-                "The intellectual, the moral, the religious seem to me all naturally bound up and interlinked together.",
-                "That brain of mine is something more than merely mortal; as time will show."
-            ]
-        }
-        
-        import random
-        responses = fallback_responses.get(speaker_name, ["I have important thoughts on this matter that deserve consideration."])
-        
-        # Use debate round to add some variety and avoid immediate repetition
-        random.seed(hash(f"{speaker_name}_{topic}_{len(context)}") % 1000)
-        return random.choice(responses)
+        return pick_fallback_quote(speaker_name, topic, context, user_question)
     
-    speaker = speakers[speaker_name]
-    
-    # Build the prompt based on the context
-    if user_question:
-        # User question mode
-        prompt = f"{speaker['prompt_template']}\n\n"
-        prompt += f"Topic: {topic}\n\n"
-        if context:
-            prompt += f"Previous conversation context:\n{context}\n\n"
-        prompt += f"Audience question: \"{user_question}\"\n\n"
-        prompt += f"Respond as {speaker_name} in 2-3 sentences. Be direct and authentic to your character."
-    elif is_debate_continuation:
-        # Debate continuation mode
-        prompt = f"{speaker['prompt_template']}\n\n"
-        prompt += f"Topic: {topic}\n\n"
-        if context:
-            prompt += f"Previous conversation context:\n{context}\n\n"
-        prompt += f"Continue the debate about {topic} as {speaker_name}. Respond in 2-3 sentences. Stay in character and be direct."
+    # Keep the prompt size flat as the debate history grows
+    if PROMPT_LAYOUT == "single":
+        prompt_context = get_context_compactor().compact(context)
+        prompt = build_speaker_prompt(speaker_name, topic, prompt_context, user_question, is_debate_continuation)
+        messages = [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": f"Respond as {speaker_name} about {topic}"}
+        ]
     else:
-        # Initial debate mode
-        prompt = f"{speaker['prompt_template']}\n\n"
-        prompt += f"Topic: {topic}\n\n"
-        prompt += f"Start the debate about {topic} as {speaker_name}. Give your initial thoughts in 2-3 sentences. Be engaging and authentic to your character."
-
-    url = "https://api.gmi-serving.com/v1/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {API_KEY}"
-    }
+        messages = build_speaker_messages(speaker_name, topic, context, user_question, is_debate_continuation)
+    mode = request_mode(user_question, is_debate_continuation)
+    budget = get_mode_budget(mode, speaker)
 
     payload = {
-        "model": "deepseek-ai/DeepSeek-R1-0528",
-        "messages": [
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": f"Respond as {speaker_name} about {topic}"}
-        ],
+        "model": get_model_route(mode, speaker)[0]["model"],
+        "messages": messages,
         "temperature": speaker.get('temperature', 0.7),
-        "stream": "false"
+        "max_tokens": budget["max_tokens"],
+        "stream": stream
     }
 
+    if stream:
+        emit = end_stream_before_failure(emit)
+        if on_delta is None:
+            def on_delta(delta):
+                emit(f"STREAM_DELTA:{json.dumps(delta)}")
+                sys.stdout.flush()
+        if on_reasoning is None:
+            on_reasoning = lambda delta: print(f"REASONING_DELTA:{json.dumps(delta)}", file=sys.stderr)
+
+    metrics.set(model=payload["model"])
+
+    cache = get_response_cache()
+    cache_key = cache.key_for(payload)
+    resp_json = cache.get(cache_key) if cache_key else None
+    metrics.set_cache_status(cache, cache_key, resp_json)
+
     try:
-        # Check if API key is valid
-        if not API_KEY or len(API_KEY.strip()) < 10:
+        if resp_json is not None:
+            log_debug(f"Debug: Response served from cache ({cache_key[:12]})")
+            status_code = 200
+            if stream:
+                # Keep the streaming framing intact: the whole cached answer arrives as one delta
+                cached_content = (resp_json["choices"][0].get("message") or {}).get("content")
+                if cached_content:
+                    on_delta(cached_content)
+                emit("STREAM_END")
+        elif cache.offline:
+            print("Error: Response cache miss in replay mode, not calling the API", file=sys.stderr)
+            emit("API_FAILED:CACHE_MISS")
+            emit("Using fallback response due to cache miss")
+            emit(generate_fallback_response())
+            return
+        elif not API_KEY or len(API_KEY.strip()) < 10:
+            # Check if API key is valid
+            log_api_key_status()
             print(f"Error: Invalid or missing API key (length: {len(API_KEY) if API_KEY else 0})", file=sys.stderr)
-            print("API_FAILED:INVALID_API_KEY")
-            print("Using fallback response due to invalid API key")
-            print(generate_fallback_response())
+            emit("API_FAILED:INVALID_API_KEY")
+            emit("Using fallback response due to invalid API key")
+            emit(generate_fallback_response())
             return
-        
-        # Log request details to stderr (for audience debug)
-        print(f"🔍 API REQUEST DEBUG:", file=sys.stderr)
-        print(f"URL: {url}", file=sys.stderr)
-        print(f"Headers: {json.dumps(headers, separators=(',', ':'))}", file=sys.stderr)
-        print(f"Payload: {json.dumps(payload, separators=(',', ':'))}", file=sys.stderr)
-        print(f"API Key (first 20 chars): {API_KEY[:20]}...", file=sys.stderr)
-            
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
-        
-        # Log response details to stderr (for audience debug)
-        print(f"🔍 API RESPONSE DEBUG:", file=sys.stderr)
-        print(f"Status Code: {response.status_code}", file=sys.stderr)
-        print(f"Response Headers: {json.dumps(dict(response.headers), separators=(',', ':'))}", file=sys.stderr)
-        print(f"Response Text: {response.text[:1000]}", file=sys.stderr)
-        
-        # Debug response to stderr
-        print(f"Debug: API Response status: {response.status_code}", file=sys.stderr)
-        print(f"Debug: API Response headers: {dict(response.headers)}", file=sys.stderr)
-        
-        try:
-            resp_json = response.json()
-            print(f"Debug: API Response: {json.dumps(resp_json, indent=2)}", file=sys.stderr)
-        except json.JSONDecodeError as e:
-            print(f"Error: Failed to parse JSON response: {str(e)}", file=sys.stderr)
-            print(f"Debug: Raw response text: {response.text[:500]}", file=sys.stderr)
-            print("API_FAILED:INVALID_JSON")
-            print("Using fallback response due to invalid JSON")
-            print(generate_fallback_response())
+        elif not get_circuit_breaker().allow_request():
+            # Skip the network entirely while the upstream is known to be down
+            print(f"Error: Circuit breaker is {get_circuit_breaker().state()}, not calling the API", file=sys.stderr)
+            emit("API_FAILED:CIRCUIT_OPEN")
+            emit("Using fallback response due to circuit breaker")
+            emit(generate_fallback_response())
             return
+        else:
+            try:
+                status_code, resp_json = post_routed_completion(payload, mode, speaker, stream, on_delta, on_reasoning,
+                                                                max_reasoning_tokens=budget.get("max_reasoning_tokens"),
+                                                                metrics=metrics)
+            except json.JSONDecodeError as e:
+                print(f"Error: Failed to parse JSON response: {str(e)}", file=sys.stderr)
+                emit("API_FAILED:INVALID_JSON")
+                emit("Using fallback response due to invalid JSON")
+                emit(generate_fallback_response())
+                return
+            if stream:
+                emit("STREAM_END")
+            log_debug(f"Debug: API Response status: {status_code}")
+            if status_code == 200 and cache_key and is_cacheable_completion(resp_json):
+                # Keyed by the model that answered, so a failover answer never passes for the primary's
+                cache.put(cache.key_for(payload), resp_json)
         
-        if response.status_code != 200:
+        if status_code != 200:
             error_msg = resp_json.get('error', {}).get('message', 'Unknown error') if isinstance(resp_json, dict) else 'Unknown error'
-            print(f"Error: API returned status code {response.status_code}: {error_msg}", file=sys.stderr)
-            print("API_FAILED:HTTP_ERROR")
-            print("Using fallback response due to HTTP error")
-            print(generate_fallback_response())
+            print(f"Error: API returned status code {status_code}: {error_msg}", file=sys.stderr)
+            emit("API_FAILED:HTTP_ERROR")
+            emit("Using fallback response due to HTTP error")
+            emit(generate_fallback_response())
             return
             
         if "choices" in resp_json and resp_json["choices"] and len(resp_json["choices"]) > 0:
@@ -433,70 +2610,895 @@ def send_query(speaker_name, topic, context="", user_question="", is_debate_cont
             message = choice.get("message", {})
             
             # Check for content first, then reasoning_content as fallback
-            result = message.get("content", "")
-            if not result and "reasoning_content" in message:
-                # Extract the final response from reasoning_content
-                reasoning = message.get("reasoning_content", "")
-                # Try to find the actual response in the reasoning
-                lines = reasoning.split('\n')
-                for line in reversed(lines):  # Start from the end
-                    line = line.strip()
-                    if line and not line.startswith('Okay,') and not line.startswith('Hmm') and not line.startswith('I need') and not line.startswith('Key points:') and not line.startswith('Remember,') and not line.startswith('As') and not line.startswith('The tension') and not line.startswith('I recall') and not line.startswith('Right,') and not line.startswith('But since') and not line.startswith('We are discussing'):
-                        # This looks like the actual response
-                        result = line
-                        break
-                
-                if not result:
-                    # If we can't extract from reasoning, use the last meaningful line
-                    for line in reversed(lines):
-                        line = line.strip()
-                        if line and len(line) > 20:  # Reasonable length for a response
-                            result = line
-                            break
+            result = extract_answer_text(message, choice.get("finish_reason"))
             
-            if result and result.lower() != "none" and len(result) > 10:
+            if not result and is_cut_off_in_reasoning(choice):
+                # The budget ran out mid-reasoning; the trace is not an answer
+                print(f"Error: Completion cut off while reasoning ({choice.get('finish_reason')})", file=sys.stderr)
+                emit("API_FAILED:TRUNCATED")
+                emit("Using fallback response due to truncated response")
+                emit(generate_fallback_response())
+            elif result and result.lower() != "none" and len(result) > 10:
                 # Handle Unicode characters properly
                 try:
-                    print(result)
+                    emit(result)
                 except UnicodeEncodeError:
                     # Fallback: encode as UTF-8 and decode, replacing problematic characters
-                    print(result.encode('utf-8', errors='replace').decode('utf-8'))
+                    emit(result.encode('utf-8', errors='replace').decode('utf-8'))
             else:
                 print(f"Error: Invalid response content: '{result}'", file=sys.stderr)
-                print("API_FAILED:INVALID_CONTENT")
-                print("Using fallback response due to invalid content")
-                print(generate_fallback_response())
+                emit("API_FAILED:INVALID_CONTENT")
+                emit("Using fallback response due to invalid content")
+                emit(generate_fallback_response())
         else:
             print("Error: No 'choices' in API response or empty choices", file=sys.stderr)
-            print("API_FAILED:NO_CHOICES")
-            print("Using fallback response due to missing choices")
-            print(generate_fallback_response())
-    except requests.exceptions.RequestException as e:
+            emit("API_FAILED:NO_CHOICES")
+            emit("Using fallback response due to missing choices")
+            emit(generate_fallback_response())
+    except RateLimitTimeout as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        emit("API_FAILED:RATE_LIMITED")
+        emit("Using fallback response due to rate limiting")
+        emit(generate_fallback_response())
+    except _requests().exceptions.RequestException as e:
         print(f"Network Error: {str(e)}", file=sys.stderr)
-        print("API_FAILED:NETWORK_ERROR")
-        print("Using fallback response due to network error")
-        print(generate_fallback_response())
+        emit("API_FAILED:NETWORK_ERROR")
+        emit("Using fallback response due to network error")
+        emit(generate_fallback_response())
     except json.JSONDecodeError as e:
         print(f"JSON Decode Error: {str(e)}", file=sys.stderr)
-        print("API_FAILED:JSON_ERROR")
-        print("Using fallback response due to JSON error")
-        print(generate_fallback_response())
+        emit("API_FAILED:JSON_ERROR")
+        emit("Using fallback response due to JSON error")
+        emit(generate_fallback_response())
     except Exception as e:
         print(f"Unexpected Error: {str(e)}", file=sys.stderr)
-        print("API_FAILED:UNEXPECTED_ERROR")
-        print("Using fallback response due to unexpected error")
-        print(generate_fallback_response())
+        emit("API_FAILED:UNEXPECTED_ERROR")
+        emit("Using fallback response due to unexpected error")
+        emit(generate_fallback_response())
+
+def query_lines(speaker_name, topic, context="", user_question="", is_debate_continuation=False):
+    """Run send_query and return its stdout lines instead of printing them"""
+    lines = []
+    send_query(speaker_name, topic, context, user_question, is_debate_continuation, emit=lines.append)
+    return [str(line) for line in lines]
+
+def is_fallback_output(lines):
+    """Return True if send_query output reports an API failure"""
+    return bool(lines) and str(lines[0]).startswith("API_FAILED:")
+
+def append_turn(context, speaker_name, text):
+    """Append a turn to the debate history the same way MainWindow joins it"""
+    turn = f"{speaker_name}: {text}"
+    return f"{context}\n{turn}" if context else turn
+
+def ask_speakers(speaker_names, topic, user_question, context="", session_id=None):
+    """Put one audience question to several speakers concurrently
+
+    Yields one result dict per speaker in completion order, so the caller can show
+    each answer as soon as it arrives. All requests share the pooled HTTP session.
+    A name missing from speakers.json yields a fallback result with
+    "error": "unknown speaker" straight away instead of an empty answer. With a
+    session_id the topic and history come from the session store, every answer
+    is appended to the session and its result carries the stored "turn".
+    Raises SessionNotFound if the session does not exist.
+    """
+    if not speaker_names:
+        return
+    started = time.monotonic()
+    if session_id:
+        session = get_session_store().get(session_id, with_turns=False)
+        if session is None:
+            raise SessionNotFound(f"Session '{session_id}' not found")
+        topic = session["topic"]
+        context, _ = get_session_store().context(session_id)
+
+    registry = get_speaker_registry()
+    known = []
+    for speaker_name in speaker_names:
+        if registry.get(speaker_name) is None:
+            print(f"Error: Speaker '{speaker_name}' not found in configuration", file=sys.stderr)
+            yield {"speaker": speaker_name, "output": "", "fallback": True, "error": "unknown speaker", "elapsed": 0.0}
+        else:
+            known.append(speaker_name)
+    if not known:
+        return
+
+    def ask(speaker_name):
+        lines = []
+        fields = send_query(speaker_name, topic, context, user_question, False, emit=lines.append)
+        lines = [str(line) for line in lines]
+        result = {
+            "speaker": speaker_name,
+            "output": "\n".join(lines),
+            "fallback": is_fallback_output(lines),
+            "elapsed": round(time.monotonic() - started, 3),
+        }
+        if session_id:
+            record = record_session_turn(session_id, speaker_name, user_question, False, lines, fields)
+            result["turn"] = record["turn"] if record else None
+        return result
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    with ThreadPoolExecutor(max_workers=len(known), thread_name_prefix="ask") as executor:
+        futures = {executor.submit(ask, name): name for name in known}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                print(f"Unexpected Error asking {futures[future]}: {str(e)}", file=sys.stderr)
+                yield {"speaker": futures[future], "output": "", "fallback": True, "error": str(e),
+                       "elapsed": round(time.monotonic() - started, 3)}
+
+def extract_answer(lines):
+    """Return (answer text, failure reason or None) from send_query output lines"""
+    if is_fallback_output(lines):
+        # API_FAILED:<reason>, the "Using fallback" notice, then the fallback answer
+        return (lines[-1] if len(lines) > 2 else ""), lines[0].split(":", 1)[1]
+    return "\n".join(lines), None
+
+# Debate sessions: every turn is stored in a SQLite database owned by this side, so
+# callers pass a session id instead of re-sending the whole history on each turn
+SESSION_DB = os.getenv("BRIGHT_MINDS_SESSION_DB")
+SESSION_TURN_FIELDS = ("speaker", "mode", "question", "text", "fallback", "model", "total", "ttfb", "first_token",
+                       "prompt_tokens", "completion_tokens", "cached_prompt_tokens", "reasoning_tokens")
+
+class SessionNotFound(Exception):
+    """Raised when a session id is not in the store"""
+
+class SessionStore:
+    """Debate sessions and their turns in a SQLite file in WAL mode
+
+    Sessions are keyed by debate id and hold the topic and speakers; turns are
+    numbered from 0 per session and carry the speaker, mode, answer, fallback
+    reason, timings and token counts of the request that produced them. Turn
+    numbers are assigned inside the insert, so several processes can append to
+    the same session at once. A fork copies the first N turns into a new
+    session that remembers its parent.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        if self._conn is None:
+            import sqlite3
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY, topic TEXT NOT NULL, speakers TEXT NOT NULL,
+                    parent_id TEXT, fork_turn INTEGER, turn_count INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL, updated_at REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at);
+                CREATE INDEX IF NOT EXISTS sessions_topic ON sessions (topic);
+                CREATE INDEX IF NOT EXISTS sessions_parent ON sessions (parent_id);
+                CREATE TABLE IF NOT EXISTS turns (
+                    session_id TEXT NOT NULL, turn INTEGER NOT NULL, speaker TEXT NOT NULL, mode TEXT,
+                    question TEXT, text TEXT NOT NULL, fallback TEXT, model TEXT, total REAL, ttfb REAL,
+                    first_token REAL, prompt_tokens INTEGER, completion_tokens INTEGER,
+                    cached_prompt_tokens INTEGER, reasoning_tokens INTEGER, created_at REAL NOT NULL,
+                    PRIMARY KEY (session_id, turn)) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS turns_speaker ON turns (speaker, mode);
+            """)
+        return self._conn
+
+    @staticmethod
+    def _session_dict(row):
+        session = dict(row)
+        session["speakers"] = json.loads(session["speakers"])
+        return session
+
+    def create(self, topic, speakers, session_id=None):
+        """Create a session and return its id; an existing id keeps its turns"""
+        session_id = session_id or os.urandom(8).hex()
+        now = time.time()
+        with self._lock:
+            self._db().execute("INSERT INTO sessions (id, topic, speakers, created_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+                               "ON CONFLICT(id) DO NOTHING", (session_id, topic, json.dumps(list(speakers)), now, now))
+        return session_id
+
+    def get(self, session_id, with_turns=True):
+        """Return the session dict (with its turns in order), or None"""
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            session = self._session_dict(row)
+            if with_turns:
+                session["turns"] = [dict(turn) for turn in db.execute(
+                    "SELECT * FROM turns WHERE session_id = ? ORDER BY turn", (session_id,))]
+        return session
+
+    def context(self, session_id):
+        """Return the session's history joined the way MainWindow joined it, plus its turn count"""
+        with self._lock:
+            rows = self._db().execute("SELECT speaker, text FROM turns WHERE session_id = ? ORDER BY turn",
+                                      (session_id,)).fetchall()
+        context = ""
+        for row in rows:
+            context = append_turn(context, row["speaker"], row["text"])
+        return context, len(rows)
+
+    def append(self, session_id, record):
+        """Append a turn built from the SESSION_TURN_FIELDS in record; returns its turn number"""
+        values = [record.get(field) for field in SESSION_TURN_FIELDS]
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                if db.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is None:
+                    raise SessionNotFound(f"Session '{session_id}' not found")
+                turn = db.execute("SELECT COALESCE(MAX(turn) + 1, 0) FROM turns WHERE session_id = ?",
+                                  (session_id,)).fetchone()[0]
+                db.execute(f"INSERT INTO turns (session_id, turn, {', '.join(SESSION_TURN_FIELDS)}, created_at) "
+                           f"VALUES (?, ?, {', '.join('?' for _ in SESSION_TURN_FIELDS)}, ?)",
+                           [session_id, turn] + values + [now])
+                db.execute("UPDATE sessions SET turn_count = ?, updated_at = ? WHERE id = ?", (turn + 1, now, session_id))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return turn
+
+    def fork(self, session_id, at_turn, new_id=None):
+        """Copy the first at_turn turns of a session into a new session and return its id"""
+        new_id = new_id or os.urandom(8).hex()
+        now = time.time()
+        columns = ", ".join(SESSION_TURN_FIELDS + ("created_at",))
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                source = db.execute("SELECT topic, speakers FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if source is None:
+                    raise SessionNotFound(f"Session '{session_id}' not found")
+                db.execute("INSERT INTO sessions (id, topic, speakers, parent_id, fork_turn, created_at, updated_at) "
+                           "VALUES (?, ?, ?, ?, ?, ?, ?)", (new_id, source["topic"], source["speakers"], session_id,
+                                                            at_turn, now, now))
+                copied = db.execute(f"INSERT INTO turns (session_id, turn, {columns}) SELECT ?, turn, {columns} "
+                                    f"FROM turns WHERE session_id = ? AND turn < ?",
+                                    (new_id, session_id, at_turn)).rowcount
+                db.execute("UPDATE sessions SET turn_count = ? WHERE id = ?", (copied, new_id))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return new_id
+
+    def find(self, limit=20, offset=0, speaker=None, topic=None):
+        """Return the most recently updated sessions, optionally only those with a speaker or topic"""
+        query, params = "SELECT * FROM sessions", []
+        if speaker:
+            query += " WHERE id IN (SELECT DISTINCT session_id FROM turns WHERE speaker = ?)"
+            params.append(speaker)
+        if topic:
+            query += (" AND" if params else " WHERE") + " topic = ?"
+            params.append(topic)
+        query += " ORDER BY updated_at DESC LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._db().execute(query, params + [limit, offset]).fetchall()
+        return [self._session_dict(row) for row in rows]
+
+    def stats(self):
+        """Return session/turn counts and per-speaker turn latency, tokens and fallback rate"""
+        with self._lock:
+            db = self._db()
+            sessions, forks = db.execute("SELECT COUNT(*), COUNT(parent_id) FROM sessions").fetchone()
+            speakers = {row["speaker"]: {"turns": row["turns"], "avg_total": row["avg_total"],
+                                         "avg_prompt_tokens": row["avg_prompt"],
+                                         "avg_completion_tokens": row["avg_completion"],
+                                         "fallback_rate": round(row["fallbacks"] / row["turns"], 3)}
+                        for row in db.execute(
+                            "SELECT speaker, COUNT(*) AS turns, ROUND(AVG(total), 3) AS avg_total, "
+                            "ROUND(AVG(prompt_tokens)) AS avg_prompt, ROUND(AVG(completion_tokens)) AS avg_completion, "
+                            "COUNT(fallback) AS fallbacks FROM turns GROUP BY speaker")}
+        return {"sessions": sessions, "forks": forks,
+                "turns": sum(entry["turns"] for entry in speakers.values()), "speakers": speakers}
+
+_session_store = None
+
+def get_session_store():
+    """Return the process-wide session store"""
+    global _session_store
+    if _session_store is None:
+        _session_store = SessionStore(SESSION_DB or get_cache_path("sessions.sqlite3"))
+    return _session_store
+
+def session_query(session_id, speaker_name, user_question="", emit=print, stream=False,
+                  on_delta=None, on_reasoning=None):
+    """Run one turn of a stored debate and append it to the session
+
+    The topic and history come from the store; without a question the turn
+    opens the debate if the session is empty and continues it otherwise.
+    Output goes to emit exactly as with send_query. Returns the stored turn
+    record, or None if the session does not exist or no answer was produced.
+    """
+    store = get_session_store()
+    session = store.get(session_id, with_turns=False)
+    if session is None:
+        print(f"Error: Session '{session_id}' not found", file=sys.stderr)
+        return None
+    context, turn_count = store.context(session_id)
+    is_debate_continuation = not user_question and turn_count > 0
+
+    lines = []
+
+    def collect(line):
+        lines.append(line)
+        emit(line)
+
+    fields = send_query(speaker_name, session["topic"], context, user_question, is_debate_continuation, emit=collect,
+                        stream=stream, on_delta=on_delta, on_reasoning=on_reasoning) or {}
+    lines = [str(line) for line in lines if not str(line).startswith("STREAM_DELTA:")]
+    if "STREAM_END" in lines:
+        lines = lines[lines.index("STREAM_END") + 1:]
+    return record_session_turn(session_id, speaker_name, user_question, is_debate_continuation, lines, fields)
+
+def record_session_turn(session_id, speaker_name, user_question, is_debate_continuation, lines, fields=None):
+    """Store a turn from send_query output lines and metrics fields; returns the record or None"""
+    text, failure = extract_answer(lines)
+    if not text:
+        return None
+    record = dict(fields or {}, speaker=speaker_name, question=user_question or None, text=text, fallback=failure,
+                  mode=request_mode(user_question, is_debate_continuation))
+    try:
+        record["turn"] = get_session_store().append(session_id, record)
+    except SessionNotFound as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return None
+    return record
+
+# Headless batch debates
+BATCH_DEFAULT_ROUNDS = 20
+BATCH_DEFAULT_CONCURRENCY = 4
+
+def load_batch_manifest(path):
+    """Read a batch manifest and return a list of debate dicts with id, speakers, topic and rounds
+
+    The manifest is JSON with either explicit "debates" entries
+    ({"speakers": [a, b], "topic": ..., "rounds": ..., "id": ...}) or "pairs" and
+    "topics" lists that are expanded into every pair/topic combination. A
+    top-level "rounds" sets the default number of turns per debate.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {"debates": manifest}
+
+    default_rounds = int(manifest.get("rounds", BATCH_DEFAULT_ROUNDS))
+    entries = list(manifest.get("debates", []))
+    for pair in manifest.get("pairs", []):
+        for topic in manifest.get("topics", []):
+            entries.append({"speakers": list(pair), "topic": topic})
+
+    debates, seen = [], set()
+    for entry in entries:
+        speakers = list(entry.get("speakers", []))
+        topic = entry.get("topic", "")
+        if len(speakers) < 2 or not topic:
+            print(f"Error: Skipping manifest entry without two speakers and a topic: {entry}", file=sys.stderr)
+            continue
+        debate_id = entry.get("id") or hashlib.sha1(json.dumps([speakers, topic]).encode('utf-8')).hexdigest()[:12]
+        if debate_id in seen:
+            print(f"Error: Skipping duplicate debate '{debate_id}' in manifest", file=sys.stderr)
+            continue
+        seen.add(debate_id)
+        debates.append({"id": debate_id, "speakers": speakers, "topic": topic,
+                        "rounds": int(entry.get("rounds", default_rounds))})
+    return debates
+
+def load_completed_turns(output_path):
+    """Return {debate_id: [turn records in order]} from an existing batch output file"""
+    completed = {}
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A crash can leave a truncated final line
+            if record.get("type") == "turn":
+                completed.setdefault(record["debate_id"], {})[record["turn"]] = record
+
+    # Only a contiguous run of real answers from the start can be resumed from;
+    # a fallback turn is retried instead of being built on
+    resumable = {}
+    for debate_id, turns in completed.items():
+        ordered = []
+        while len(ordered) in turns and not turns[len(ordered)].get("fallback"):
+            ordered.append(turns[len(ordered)])
+        resumable[debate_id] = ordered
+    return resumable
+
+def run_debate(debate, write_record, done_turns=()):
+    """Run one debate turn by turn, calling write_record for every new turn
+
+    A fallback turn is recorded and stops the debate, so the other speakers do
+    not argue with a canned quote; a later run retries it.
+    """
+    speakers, topic = debate["speakers"], debate["topic"]
+    context = ""
+    for record in done_turns:
+        context = append_turn(context, record["speaker"], record["text"])
+
+    for turn in range(len(done_turns), debate["rounds"]):
+        speaker_name = speakers[turn % len(speakers)]
+        started = time.monotonic()
+        lines = query_lines(speaker_name, topic, context, "", turn > 0)
+        text, failure = extract_answer(lines)
+        if not text:
+            print(f"Error: No response for {speaker_name} in debate {debate['id']}, stopping it", file=sys.stderr)
+            return False
+        write_record({
+            "type": "turn",
+            "debate_id": debate["id"],
+            "turn": turn,
+            "speaker": speaker_name,
+            "topic": topic,
+            "text": text,
+            "fallback": failure,
+            "elapsed": round(time.monotonic() - started, 3),
+        })
+        if failure:
+            print(f"Error: Fallback response ({failure}) for {speaker_name} in debate {debate['id']}, stopping it", file=sys.stderr)
+            return False
+        context = append_turn(context, speaker_name, text)
+    return True
+
+def run_batch(manifest_path, output_path, concurrency=BATCH_DEFAULT_CONCURRENCY):
+    """Run every debate in the manifest with at most `concurrency` requests in flight
+
+    Each turn is appended to output_path as a JSON line as soon as it completes.
+    Re-running with the same manifest and output resumes every debate after its
+    last completed turn.
+    """
+    debates = load_batch_manifest(manifest_path)
+    completed = load_completed_turns(output_path)
+    pending = [d for d in debates if len(completed.get(d["id"], [])) < d["rounds"]]
+    log_info(f"Debug: Batch has {len(debates)} debates, {len(debates) - len(pending)} already complete")
+
+    # Make sure a truncated line from a previous crash does not swallow the next record
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    else:
+        needs_newline = False
+
+    write_lock = threading.Lock()
+    with open(output_path, 'a', encoding='utf-8') as out:
+        if needs_newline:
+            out.write("\n")
+
+        def write_record(record):
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        finished = 0
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="debate") as executor:
+            futures = {executor.submit(run_debate, d, write_record, completed.get(d["id"], [])): d for d in pending}
+            for future in as_completed(futures):
+                debate = futures[future]
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    print(f"Unexpected Error in debate {debate['id']}: {str(e)}", file=sys.stderr)
+                    ok = False
+                if ok:
+                    finished += 1
+                    write_record({"type": "debate_end", "debate_id": debate["id"], "turns": debate["rounds"]})
+                log_info(f"Debug: Debate {debate['id']} {'finished' if ok else 'stopped'} ({finished}/{len(pending)})")
+    return finished
+
+PREFETCH_MAX_PENDING = 8  # speculative turns kept per process; the oldest is dropped beyond this
+
+class TurnPrefetcher:
+    """Speculatively generates the next debate turn while the current one is on screen
+
+    start() submits a turn in the background; take() hands back its output if a
+    later query asks for exactly the same speaker, topic, context and mode,
+    waiting for it if it is still in flight. cancel_all() discards every
+    speculative turn, e.g. when an audience question changes the conversation.
+    A take() for a topic also discards that topic's other speculative turns,
+    since the debate has moved past them, and at most max_pending turns are
+    kept (oldest dropped first) so unmatched ones cannot pile up.
+    """
+
+    def __init__(self, max_workers=2, max_pending=PREFETCH_MAX_PENDING):
+        from concurrent.futures import ThreadPoolExecutor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.max_pending = max_pending
+        self.stats = {"started": 0, "used": 0, "discarded": 0}
+
+    @staticmethod
+    def _key(speaker_name, topic, context, user_question, is_debate_continuation):
+        return (speaker_name, topic, context, user_question, bool(is_debate_continuation))
+
+    @staticmethod
+    def _run(key):
+        lines = []
+        fields = send_query(*key, emit=lines.append)
+        return [str(line) for line in lines], fields
+
+    def _discard(self, keys, reason):
+        """Drop the given pending turns; the caller holds self._lock"""
+        for key in keys:
+            self._pending.pop(key).cancel()
+        self.stats["discarded"] += len(keys)
+        if keys:
+            log_debug(f"Debug: Discarded {len(keys)} prefetched turn(s){': ' + reason if reason else ''}")
+
+    def start(self, speaker_name, topic, context="", user_question="", is_debate_continuation=True):
+        key = self._key(speaker_name, topic, context, user_question, is_debate_continuation)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._discard(list(self._pending)[:max(0, len(self._pending) - self.max_pending + 1)], "too many pending")
+            self._pending[key] = self._executor.submit(self._run, key)
+            self.stats["started"] += 1
+        log_debug(f"Debug: Prefetching next turn for {speaker_name}")
+
+    def take(self, speaker_name, topic, context="", user_question="", is_debate_continuation=True):
+        """Return (output lines, metrics fields) of the prefetched turn for this exact turn, or None"""
+        key = self._key(speaker_name, topic, context, user_question, is_debate_continuation)
+        with self._lock:
+            future = self._pending.pop(key, None)
+            self._discard([other for other in self._pending if other[1] == topic], "superseded by the current turn")
+        if future is None:
+            return None
+        try:
+            result = future.result()
+        except Exception as e:
+            log_info(f"Debug: Prefetched turn for {speaker_name} failed: {str(e)}")
+            return None
+        with self._lock:
+            self.stats["used"] += 1
+        log_debug(f"Debug: Using prefetched turn for {speaker_name}")
+        return result
+
+    def cancel_all(self, reason=""):
+        """Drop every speculative turn; in-flight requests finish but their results are ignored"""
+        with self._lock:
+            self._discard(list(self._pending), reason)
+
+_turn_prefetcher = None
+
+def get_turn_prefetcher():
+    """Return the process-wide turn prefetcher"""
+    global _turn_prefetcher
+    if _turn_prefetcher is None:
+        _turn_prefetcher = TurnPrefetcher()
+    return _turn_prefetcher
+
+def handle_request(request, notify=None):
+    """Run a single worker request and return its response dict
+
+    notify, if given, receives intermediate events (stream deltas) for the request.
+    """
+    request_id = request.get("id")
+    cmd = request.get("cmd", "query")
+    lines = []
+
+    if cmd == "ping":
+        return {"id": request_id, "ok": True, "output": "pong"}
+
+    if cmd == "health":
+        return {"id": request_id, "ok": True, "health": check_api_health(force=bool(request.get("force", False)))}
+
+    if cmd == "cache_stats":
+        return {"id": request_id, "ok": True, "stats": get_response_cache().stats()}
+
+    if cmd == "budget_stats":
+        return {"id": request_id, "ok": True, "stats": budget_stats()}
+
+    if cmd == "rate_limit_stats":
+        return {"id": request_id, "ok": True, "stats": get_rate_limiter().stats()}
+
+    if cmd == "route_stats":
+        return {"id": request_id, "ok": True, "stats": get_model_router().stats()}
+
+    if cmd == "topic_pool_stats":
+        return {"id": request_id, "ok": True, "stats": get_topic_pool().stats()}
+
+    if cmd == "session_new":
+        session_id = get_session_store().create(request.get("topic", ""), request.get("speakers", []),
+                                                request.get("session"))
+        return {"id": request_id, "ok": True, "session": session_id}
+
+    if cmd == "session_get":
+        session = get_session_store().get(request.get("session", ""))
+        if session is None:
+            return {"id": request_id, "ok": False, "error": f"Session '{request.get('session')}' not found"}
+        return {"id": request_id, "ok": True, "session": session}
+
+    if cmd == "session_fork":
+        try:
+            session_id = get_session_store().fork(request.get("session", ""), int(request.get("turn", 0)),
+                                                  request.get("new_session"))
+        except SessionNotFound as e:
+            return {"id": request_id, "ok": False, "error": str(e)}
+        return {"id": request_id, "ok": True, "session": session_id}
+
+    if cmd == "session_list":
+        sessions = get_session_store().find(int(request.get("limit", 20)), int(request.get("offset", 0)),
+                                            request.get("speaker"), request.get("topic"))
+        return {"id": request_id, "ok": True, "sessions": sessions}
+
+    if cmd == "session_stats":
+        return {"id": request_id, "ok": True, "stats": get_session_store().stats()}
+
+    if cmd == "prefetch_stats":
+        return {"id": request_id, "ok": True, "stats": dict(get_turn_prefetcher().stats)}
+
+    if cmd == "cancel_prefetch":
+        get_turn_prefetcher().cancel_all("cancelled by client")
+        return {"id": request_id, "ok": True, "output": ""}
+
+    if cmd == "prefetch":
+        get_turn_prefetcher().start(
+            request.get("speaker", ""),
+            request.get("topic", ""),
+            request.get("context", ""),
+            request.get("question", ""),
+            bool(request.get("continuation", True)),
+        )
+        return {"id": request_id, "ok": True, "output": ""}
+
+    if cmd == "ask":
+        get_turn_prefetcher().cancel_all("audience question")
+        results = []
+        try:
+            for result in ask_speakers(request.get("speakers", []), request.get("topic", ""),
+                                       request.get("question", ""), request.get("context", ""),
+                                       session_id=request.get("session")):
+                results.append(result)
+                if notify is not None:
+                    notify(dict(result, id=request_id, event="answer"))
+        except SessionNotFound as e:
+            return {"id": request_id, "ok": False, "error": str(e)}
+        return {"id": request_id, "ok": True, "results": results}
+
+    if cmd == "topic":
+        generate_topic(emit=lines.append)
+    elif cmd == "query":
+        speaker_name = request.get("speaker", "")
+        topic = request.get("topic", "")
+        context = request.get("context", "")
+        user_question = request.get("question", "")
+        is_debate_continuation = bool(request.get("continuation", False))
+        session_id = request.get("session")
+        if session_id:
+            # A stored session supplies the topic and history; the client only sends the new input
+            session = get_session_store().get(session_id, with_turns=False)
+            if session is None:
+                return {"id": request_id, "ok": False, "error": f"Session '{session_id}' not found"}
+            topic = session["topic"]
+            context, turn_count = get_session_store().context(session_id)
+            is_debate_continuation = not user_question and turn_count > 0
+        prefetcher = get_turn_prefetcher()
+        fields = None
+
+        if user_question:
+            # An audience question changes the conversation; speculative turns are stale
+            prefetcher.cancel_all("audience question")
+            prefetched = None
+        else:
+            prefetched = prefetcher.take(speaker_name, topic, context, user_question, is_debate_continuation)
+
+        if prefetched is not None:
+            lines, fields = prefetched
+        else:
+            stream = bool(request.get("stream", False)) and notify is not None
+            fields = send_query(
+                speaker_name,
+                topic,
+                context,
+                user_question,
+                is_debate_continuation,
+                emit=lines.append,
+                stream=stream,
+                on_delta=(lambda delta: notify({"id": request_id, "event": "delta", "text": delta})) if stream else None,
+                on_reasoning=(lambda delta: notify({"id": request_id, "event": "reasoning", "text": delta})) if stream else None,
+            )
+            if stream and "STREAM_END" in lines:
+                # Deltas were already delivered as events; only the final answer belongs in output
+                lines = lines[lines.index("STREAM_END") + 1:]
+
+        turn = None
+        if session_id:
+            record = record_session_turn(session_id, speaker_name, user_question, is_debate_continuation,
+                                         [str(line) for line in lines], fields)
+            turn = record["turn"] if record else None
+
+        # Start generating the other speaker's reply while this turn is on screen
+        next_speaker = request.get("prefetch_next")
+        if next_speaker and not user_question and lines and not is_fallback_output(lines):
+            answer = "\n".join(str(line) for line in lines)
+            prefetcher.start(next_speaker, topic, append_turn(context, speaker_name, answer), "", True)
+        if turn is not None:
+            return {"id": request_id, "ok": True, "output": "\n".join(str(line) for line in lines), "turn": turn}
+    else:
+        return {"id": request_id, "ok": False, "error": f"Unknown command: {cmd}"}
+
+    return {"id": request_id, "ok": True, "output": "\n".join(str(line) for line in lines)}
+
+def serve():
+    """Worker mode: read JSON requests from stdin, write tagged JSON responses to stdout
+
+    Each input line is an object such as
+        {"id": 1, "cmd": "query", "speaker": "Elon Musk", "topic": "AI Ethics",
+         "context": "", "question": "", "continuation": true}
+    and each output line echoes the id with either "output" or "error".
+    Queries with "stream": true additionally produce {"id", "event": "delta"|"reasoning", "text"}
+    lines before the final response. A query with "prefetch_next": "<speaker>" starts that
+    speaker's next turn in the background as soon as the answer is ready; a later query
+    for the same turn returns it immediately, and a query carrying an audience question
+    discards it. {"cmd": "ask", "speakers": [...], "topic", "context", "question"} answers
+    one audience question from every speaker concurrently, sending an "answer" event per
+    speaker as it finishes. A query with "session": "<id>" instead of topic and context
+    takes both from the session store and appends the answer as the session's next turn
+    (the response carries its "turn" number). Supported commands: query, ask, topic,
+    prefetch, cancel_prefetch, prefetch_stats, budget_stats, health, cache_stats,
+    rate_limit_stats, route_stats, topic_pool_stats, session_new, session_get, session_fork,
+    session_list, session_stats, ping, shutdown.
+    """
+    output_lock = threading.Lock()
+
+    def respond(response):
+        with output_lock:
+            sys.stdout.write(json.dumps(response) + "\n")
+            sys.stdout.flush()
+
+    log_debug("Debug: Worker mode ready, waiting for requests on stdin")
+    respond({"event": "ready"})
+    if get_topic_pool().stats()["available"] < TOPIC_POOL_LOW_WATER:
+        schedule_topic_refill()
+
+    for raw_line in sys.stdin:
+        raw_line = raw_line.strip()
+        if not raw_line:
+            continue
+        try:
+            request = json.loads(raw_line)
+        except json.JSONDecodeError as e:
+            respond({"id": None, "ok": False, "error": f"Invalid JSON request: {str(e)}"})
+            continue
+        if not isinstance(request, dict):
+            respond({"id": None, "ok": False, "error": "Request must be a JSON object"})
+            continue
+
+        if request.get("cmd") == "shutdown":
+            respond({"id": request.get("id"), "ok": True, "output": "bye"})
+            break
+
+        try:
+            respond(handle_request(request, notify=respond))
+        except Exception as e:
+            print(f"Unexpected Error in worker: {str(e)}", file=sys.stderr)
+            respond({"id": request.get("id"), "ok": False, "error": str(e)})
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python python_interface.py <speaker_name> <topic> [context] [user_question] [is_debate_continuation]")
+    configure_stdout()
+    stream_output = "--stream" in sys.argv
+    if stream_output:
+        sys.argv.remove("--stream")
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--ask":
+        if len(sys.argv) < 6:
+            print("Usage: python python_interface.py --ask <topic> <user_question> <context|-> <speaker_name> [<speaker_name> ...]")
+            print("       python python_interface.py --ask --session <session_id> <user_question> <speaker_name> [<speaker_name> ...]")
+        else:
+            if sys.argv[2] == "--session":
+                ask_args = {"speaker_names": sys.argv[5:], "topic": "", "user_question": sys.argv[4],
+                            "session_id": sys.argv[3]}
+            else:
+                ask_args = {"speaker_names": sys.argv[5:], "topic": sys.argv[2], "user_question": sys.argv[3],
+                            "context": sys.stdin.read() if sys.argv[4] == "-" else sys.argv[4]}
+            try:
+                for result in ask_speakers(**ask_args):
+                    print(json.dumps(result))
+                    sys.stdout.flush()
+            except SessionNotFound as e:
+                print(f"Error: {str(e)}", file=sys.stderr)
+                sys.exit(1)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        if len(sys.argv) < 4:
+            print("Usage: python python_interface.py --batch <manifest.json> <output.jsonl> [concurrency]")
+        else:
+            run_batch(sys.argv[2], sys.argv[3], int(sys.argv[4]) if len(sys.argv) > 4 else BATCH_DEFAULT_CONCURRENCY)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--session-new":
+        if len(sys.argv) < 5:
+            print("Usage: python python_interface.py --session-new <topic> <speaker_name> <speaker_name> [...]")
+        else:
+            print(get_session_store().create(sys.argv[2], sys.argv[3:]))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--session":
+        if len(sys.argv) < 4:
+            print("Usage: python python_interface.py --session <session_id> <speaker_name> [user_question]")
+        else:
+            session_query(sys.argv[2], sys.argv[3], sys.argv[4] if len(sys.argv) > 4 else "", stream=stream_output)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--session-fork":
+        if len(sys.argv) < 4:
+            print("Usage: python python_interface.py --session-fork <session_id> <turn>")
+        else:
+            try:
+                print(get_session_store().fork(sys.argv[2], int(sys.argv[3])))
+            except SessionNotFound as e:
+                print(f"Error: {str(e)}", file=sys.stderr)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--session-show":
+        print(json.dumps(get_session_store().get(sys.argv[2]) if len(sys.argv) > 2 else None, ensure_ascii=False))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--session-list":
+        print(json.dumps(get_session_store().find(int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+                                                   speaker=sys.argv[3] if len(sys.argv) > 3 else None),
+                         ensure_ascii=False))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--session-stats":
+        print(json.dumps(get_session_store().stats()))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--metrics-summary":
+        summarize_metrics(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--cache-stats":
+        print(json.dumps(get_response_cache().stats()))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--health":
+        print(json.dumps(check_api_health(force="--force" in sys.argv)))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--rate-limit-stats":
+        print(json.dumps(get_rate_limiter().stats()))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--route-stats":
+        print(json.dumps(get_model_router().stats()))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--refill-topics":
+        refill_topic_pool()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--topic-pool-stats":
+        print(json.dumps(get_topic_pool().stats()))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--build-quote-index":
+        index = get_quote_index(rebuild=True)
+        if index is None:
+            print("Error: quotes.json not found", file=sys.stderr)
+        else:
+            print(json.dumps({name: count for name, (_, count) in index.speakers.items()}))
+    elif len(sys.argv) < 3:
+        print("Usage: python python_interface.py <speaker_name> <topic> [context|-] [user_question] [is_debate_continuation]")
+        print("       python python_interface.py --stream <speaker_name> <topic> [...]")
+        print("       python python_interface.py --ask <topic> <user_question> <context|-> <speaker_name> [...]")
+        print("       python python_interface.py --ask --session <session_id> <user_question> <speaker_name> [...]")
+        print("       python python_interface.py --batch <manifest.json> <output.jsonl> [concurrency]")
+        print("       python python_interface.py --session-new <topic> <speaker_name> <speaker_name> [...]")
+        print("       python python_interface.py --session <session_id> <speaker_name> [user_question]")
+        print("       python python_interface.py --session-fork <session_id> <turn>")
+        print("       python python_interface.py --session-show <session_id>")
+        print("       python python_interface.py --session-list [limit] [speaker_name]")
+        print("       python python_interface.py --session-stats")
+        print("       python python_interface.py --serve")
+        print("       python python_interface.py --health [--force]")
+        print("       python python_interface.py --cache-stats")
+        print("       python python_interface.py --rate-limit-stats")
+        print("       python python_interface.py --route-stats")
+        print("       python python_interface.py --build-quote-index")
+        print("       python python_interface.py --refill-topics")
+        print("       python python_interface.py --topic-pool-stats")
+        print("       python python_interface.py --metrics-summary [metrics.jsonl]")
         print("Example: python python_interface.py 'Elon Musk' 'AI Ethics'")
         print("Example: python python_interface.py 'Steve Jobs' 'Design Philosophy' 'Previous context here' 'User question here' 'true'")
     else:
         speaker_name = sys.argv[1]
         topic = sys.argv[2]
         context = sys.argv[3] if len(sys.argv) > 3 else ""
+        if context == "-":
+            # Long histories can be piped in to stay clear of command-line length limits
+            context = sys.stdin.read()
         user_question = sys.argv[4] if len(sys.argv) > 4 else ""
         is_debate_continuation = sys.argv[5].lower() == 'true' if len(sys.argv) > 5 else False
-        
-        send_query(speaker_name, topic, context, user_question, is_debate_continuation)
+        _run_once = True
+
+        send_query(speaker_name, topic, context, user_question, is_debate_continuation, stream=stream_output)
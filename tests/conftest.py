@@ -0,0 +1,52 @@
+# conftest.py
+"""Fixtures shared by the test modules: the local mock server and python_interface configured against it"""
+import importlib
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+from mock_gmi_server import start_mock_server  # noqa: E402
+
+MOCK_CONFIG = {"latency": 0.0, "jitter": 0.0, "tokens_per_sec": 0, "reasoning_tokens": 8, "answer_tokens": 12}
+
+@pytest.fixture(scope="session")
+def mock():
+    server, url = start_mock_server(**MOCK_CONFIG)
+    yield server, url
+    server.shutdown()
+
+@pytest.fixture(scope="session")
+def pi(mock):
+    """python_interface configured against the mock; settings are read at import time"""
+    os.environ.update({
+        "GMI_API_URL": mock[1],
+        "GMI_API_KEY": "test-key-0123456789",
+        "BRIGHT_MINDS_CACHE_DIR": tempfile.mkdtemp(prefix="bright_minds_test_"),
+        "GMI_RESPONSE_CACHE": "off",
+        "GMI_MAX_RETRIES": "0",
+        "GMI_HEDGE_PERCENTILE": "0",
+        "GMI_BREAKER_FAILURE_THRESHOLD": "1000",
+    })
+    return importlib.import_module("python_interface")
+
+def run_processes(script, count, *args):
+    """Run script in count concurrent interpreters with python_interface importable; returns their stdout
+
+    Each process gets its index as sys.argv[1] and args after it.
+    """
+    env = dict(os.environ, PYTHONPATH=SRC, GMI_LOG_LEVEL="warning")
+    procs = [subprocess.Popen([sys.executable, "-c", script, str(index), *map(str, args)], env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+             for index in range(count)]
+    results = [proc.communicate(timeout=60) for proc in procs]
+    for proc, (_, err) in zip(procs, results):
+        assert proc.returncode == 0, err
+    return [out for out, _ in results]
@@ -0,0 +1,74 @@
+# test_quote_index.py
+"""Binary quote index: build, memory-mapped round trip, and reuse of the cached index file across processes"""
+import json
+import os
+
+import pytest
+
+from conftest import run_processes
+
+CORPUS = {
+    "Marie Curie": ["Nothing in life is to be feared, it is only to be understood.",
+                    "Radioactivity is a property of the atom itself."],
+    "Ada Lovelace": ["The engine weaves algebraic patterns just as the loom weaves flowers.",
+                     "Imagination is the discovering faculty, pre-eminently. Ça compte."],
+}
+
+INDEX_READER = """
+import sys
+import python_interface as pi
+pi.QUOTES_FILE, pi.CACHE_DIR = sys.argv[2], sys.argv[3]
+index = pi.get_quote_index()
+print(index.quote(index.search("Ada Lovelace", {"loom": 1.0})[0][1]))
+"""
+
+def write_quotes(path, corpus):
+    path.write_text(json.dumps({"speakers": corpus}), encoding="utf-8")
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+@pytest.fixture
+def quotes(pi, tmp_path, monkeypatch):
+    """quotes.json and an empty cache directory in tmp_path, with no index loaded yet"""
+    path = tmp_path / "quotes.json"
+    write_quotes(path, CORPUS)
+    monkeypatch.setattr(pi, "QUOTES_FILE", str(path))
+    monkeypatch.setattr(pi, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(pi, "_quote_index", None)
+    return path
+
+def test_mapped_index_reads_back_what_was_built(pi, tmp_path):
+    path = tmp_path / "quotes.idx"
+    path.write_bytes(pi.build_quote_index(CORPUS, (123, 456)))
+    index = pi.QuoteIndex.open(str(path))
+    try:
+        assert (index.mtime_ns, index.size) == (123, 456)
+        assert index.speakers == {"Ada Lovelace": (0, 2), "Marie Curie": (2, 2)}
+        docs = [quote for speaker in sorted(CORPUS) for quote in CORPUS[speaker]]
+        assert [index.quote(doc_id) for doc_id in range(len(docs))] == docs
+        assert [doc_id for doc_id, _ in index.postings("weav")] == [0]
+        assert index.postings("absent") == []
+        assert index.search("Marie Curie", {"atom": 1.0})[0][1] == 3
+    finally:
+        index.close()
+
+def test_index_rejects_other_files(pi):
+    with pytest.raises(ValueError):
+        pi.QuoteIndex(b"NOTANIDX" + bytes(40))
+
+def test_index_file_is_built_once_and_reused_by_other_processes(pi, quotes, tmp_path):
+    index = pi.get_quote_index()
+    assert pi.get_quote_index() is index
+    (index_file,) = (tmp_path / "cache").iterdir()
+    built = index_file.stat().st_mtime_ns
+    outputs = run_processes(INDEX_READER, 3, quotes, tmp_path / "cache")
+    assert {out.strip() for out in outputs} == {CORPUS["Ada Lovelace"][0]}
+    assert index_file.stat().st_mtime_ns == built
+
+def test_index_is_rebuilt_when_the_quotes_change(pi, quotes):
+    index = pi.get_quote_index()
+    fingerprint = write_quotes(quotes, dict(CORPUS, **{"Nikola Tesla": ["The present is theirs; the future is mine."]}))
+    rebuilt = pi.get_quote_index()
+    assert rebuilt is not index
+    assert (rebuilt.mtime_ns, rebuilt.size) == fingerprint
+    assert "Nikola Tesla" in rebuilt.speakers
@@ -0,0 +1,73 @@
+# test_sessions.py
+"""SessionStore appends and forks, concurrent appends from several processes, and session turns against the mock"""
+import pytest
+
+from conftest import run_processes
+
+SESSION_WRITER = """
+import sys
+import python_interface as pi
+store = pi.SessionStore(sys.argv[2])
+for i in range(int(sys.argv[3])):
+    print(store.append("debate", {"speaker": f"Speaker {sys.argv[1]}", "text": f"turn {i}"}))
+"""
+
+@pytest.fixture
+def store(pi, tmp_path):
+    return pi.SessionStore(str(tmp_path / "sessions.sqlite3"))
+
+def add_turns(store, session_id, *texts):
+    return [store.append(session_id, {"speaker": "Ada Lovelace", "mode": "chat", "text": text}) for text in texts]
+
+def test_appended_turns_are_numbered_in_order(pi, store):
+    session_id = store.create("Artificial Intelligence", ["Ada Lovelace", "Alan Turing"])
+    assert add_turns(store, session_id, "first", "second", "third") == [0, 1, 2]
+    session = store.get(session_id)
+    assert session["speakers"] == ["Ada Lovelace", "Alan Turing"]
+    assert session["turn_count"] == 3
+    assert [turn["text"] for turn in session["turns"]] == ["first", "second", "third"]
+    context, turn_count = store.context(session_id)
+    assert turn_count == 3 and context == pi.append_turn(pi.append_turn(pi.append_turn(
+        "", "Ada Lovelace", "first"), "Ada Lovelace", "second"), "Ada Lovelace", "third")
+
+def test_missing_sessions_are_reported(pi, store):
+    assert store.get("missing") is None
+    with pytest.raises(pi.SessionNotFound):
+        store.append("missing", {"speaker": "Ada Lovelace", "text": "hello"})
+    with pytest.raises(pi.SessionNotFound):
+        store.fork("missing", 0)
+
+def test_fork_is_independent_of_its_parent(store):
+    parent = store.create("Artificial Intelligence", ["Ada Lovelace", "Alan Turing"])
+    add_turns(store, parent, "first", "second", "third")
+    fork = store.fork(parent, 2)
+    assert store.get(fork, with_turns=False)["parent_id"] == parent
+    assert [turn["text"] for turn in store.get(fork)["turns"]] == ["first", "second"]
+
+    assert add_turns(store, fork, "fork only") == [2]
+    assert add_turns(store, parent, "parent only") == [3]
+    assert [turn["text"] for turn in store.get(fork)["turns"]] == ["first", "second", "fork only"]
+    assert [turn["text"] for turn in store.get(parent)["turns"]] == ["first", "second", "third", "parent only"]
+    assert store.stats()["forks"] == 1
+
+def test_concurrent_processes_append_without_losing_turns(pi, tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+    pi.SessionStore(str(path)).create("Artificial Intelligence", ["Speaker 0", "Speaker 1"], session_id="debate")
+    outputs = run_processes(SESSION_WRITER, 4, path, 10)
+    assert sorted(int(turn) for out in outputs for turn in out.split()) == list(range(40))
+    session = pi.SessionStore(str(path)).get("debate")
+    assert session["turn_count"] == 40
+    for speaker in range(4):
+        texts = [turn["text"] for turn in session["turns"] if turn["speaker"] == f"Speaker {speaker}"]
+        assert texts == [f"turn {i}" for i in range(10)]
+
+def test_session_query_stores_each_answer(pi, store, monkeypatch):
+    monkeypatch.setattr(pi, "_session_store", store)
+    session_id = store.create("Artificial Intelligence", ["Elon Musk"])
+    lines = []
+    first = pi.session_query(session_id, "Elon Musk", emit=lines.append)
+    second = pi.session_query(session_id, "Elon Musk", "What about jobs?", emit=lines.append)
+    assert (first["turn"], second["turn"]) == (0, 1)
+    turns = store.get(session_id)["turns"]
+    assert [turn["question"] for turn in turns] == [None, "What about jobs?"]
+    assert all(turn["text"] and turn["fallback"] is None for turn in turns)
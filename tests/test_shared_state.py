@@ -0,0 +1,149 @@
+# test_shared_state.py
+"""State files shared by every process (latency samples, circuit breaker, rate limiter), exercised in process and by concurrent interpreters"""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import run_processes
+
+LATENCY_WRITER = """
+import sys
+import python_interface as pi
+tracker = pi.LatencyTracker(sys.argv[2], window=1000)
+for _ in range(int(sys.argv[3])):
+    tracker.record("chat|full", 0.25)
+"""
+
+def test_latency_window_keeps_the_most_recent_samples(pi, tmp_path):
+    tracker = pi.LatencyTracker(str(tmp_path / "latency.json"), window=3)
+    for seconds in (1, 2, 3, 4):
+        tracker.record("chat|full", seconds)
+    assert pi.read_json_file(tracker.path, {}) == {"chat|full": [2, 3, 4]}
+
+def test_latency_samples_from_concurrent_processes_are_all_kept(pi, tmp_path):
+    path = tmp_path / "latency.json"
+    run_processes(LATENCY_WRITER, 4, path, 25)
+    assert len(pi.read_json_file(str(path), {})["chat|full"]) == 100
+
+BREAKER_TRIAL = """
+import sys
+import python_interface as pi
+print(pi.CircuitBreaker(sys.argv[2], failure_threshold=1, cooldown=60).allow_request())
+"""
+
+BREAKER_FAILURES = """
+import sys
+import python_interface as pi
+breaker = pi.CircuitBreaker(sys.argv[2], failure_threshold=1000)
+for _ in range(int(sys.argv[3])):
+    breaker.record_failure("HTTP 503")
+"""
+
+def open_breaker(pi, path, cooldown):
+    breaker = pi.CircuitBreaker(str(path), failure_threshold=2, cooldown=cooldown)
+    breaker.record_failure("HTTP 503")
+    assert breaker.state() == breaker.CLOSED and breaker.allow_request()
+    breaker.record_failure("HTTP 503")
+    return breaker
+
+def test_breaker_opens_at_the_threshold_and_rejects_until_the_cooldown(pi, tmp_path):
+    breaker = open_breaker(pi, tmp_path / "health.json", cooldown=60)
+    assert breaker.state() == breaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.cached_probe()["healthy"] is False
+
+def test_breaker_half_open_trial_closes_on_success(pi, tmp_path):
+    breaker = open_breaker(pi, tmp_path / "health.json", cooldown=0.1)
+    pi.time.sleep(0.15)
+    assert breaker.state() == breaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state() == breaker.CLOSED and breaker.allow_request()
+    assert pi.read_json_file(breaker.path, {})["failures"] == 0
+
+def test_breaker_half_open_trial_reopens_on_failure(pi, tmp_path):
+    breaker = open_breaker(pi, tmp_path / "health.json", cooldown=0.1)
+    pi.time.sleep(0.15)
+    assert breaker.allow_request()
+    breaker.record_failure("HTTP 502")
+    assert pi.read_json_file(breaker.path, {})["state"] == breaker.OPEN
+    assert not breaker.allow_request()
+
+def test_breaker_lets_one_trial_through_across_processes(pi, tmp_path):
+    path = tmp_path / "health.json"
+    pi.write_json_file(str(path), {"state": "open", "failures": 1, "opened_at": pi.time.time() - 120})
+    outputs = run_processes(BREAKER_TRIAL, 6, path)
+    assert [out.strip() for out in outputs].count("True") == 1
+
+def test_breaker_counts_failures_from_concurrent_processes(pi, tmp_path):
+    path = tmp_path / "health.json"
+    run_processes(BREAKER_FAILURES, 4, path, 10)
+    assert pi.read_json_file(str(path), {})["failures"] == 40
+
+LIMITER_CALLER = """
+import sys
+import time
+import python_interface as pi
+limiter = pi.RateLimiter(sys.argv[2], rpm=600, tpm=0, burst=0.1)
+for _ in range(int(sys.argv[3])):
+    limiter.acquire(0, time.monotonic() + 30)
+    print(time.time())
+"""
+
+def limiter(pi, tmp_path):
+    # 10 requests per second with room for one: each admission after the first waits 0.1s
+    return pi.RateLimiter(str(tmp_path / "ratelimit.json"), rpm=600, tpm=0, burst=0.1)
+
+def test_limiter_paces_requests_to_the_refill_rate(pi, tmp_path):
+    rate_limiter = limiter(pi, tmp_path)
+    deadline = pi.time.monotonic() + 10
+    assert rate_limiter.acquire(0, deadline) == 0.0
+    started = pi.time.monotonic()
+    for _ in range(3):
+        rate_limiter.acquire(0, deadline)
+    assert pi.time.monotonic() - started >= 0.25
+
+def test_limiter_raises_when_no_slot_fits_the_deadline(pi, tmp_path):
+    rate_limiter = limiter(pi, tmp_path)
+    rate_limiter.acquire(0, pi.time.monotonic() + 10)
+    with pytest.raises(pi.RateLimitTimeout):
+        rate_limiter.acquire(0, pi.time.monotonic() + 10, block=False)
+    with pytest.raises(pi.RateLimitTimeout):
+        rate_limiter.acquire(0, pi.time.monotonic() + 0.01)
+    assert rate_limiter.stats()["queued"] == 0  # a caller that gives up leaves the queue
+
+def test_retry_after_blocks_every_caller(pi, tmp_path):
+    rate_limiter = limiter(pi, tmp_path)
+    rate_limiter.observe(SimpleNamespace(status_code=429, headers={"Retry-After": "0.5"}))
+    assert rate_limiter.stats()["blocked_for"] > 0
+    other = limiter(pi, tmp_path)  # a second caller sharing the state file
+    waited = other.acquire(0, pi.time.monotonic() + 10)
+    assert waited >= 0.4
+
+def test_limiter_admits_queued_callers_in_arrival_order(pi, tmp_path):
+    rate_limiter = limiter(pi, tmp_path)
+    rate_limiter.observe(SimpleNamespace(status_code=429, headers={"Retry-After": "0.4"}))
+    admitted = []
+
+    def call(name):
+        rate_limiter.acquire(0, pi.time.monotonic() + 10)
+        admitted.append(name)
+
+    threads = []
+    for name in ("first", "second", "third"):
+        threads.append(threading.Thread(target=call, args=(name,)))
+        threads[-1].start()
+        pi.time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+    assert admitted == ["first", "second", "third"]
+
+def test_limiter_paces_callers_across_processes(pi, tmp_path):
+    outputs = run_processes(LIMITER_CALLER, 4, tmp_path / "ratelimit.json", 3)
+    admitted = sorted(float(line) for out in outputs for line in out.split())
+    assert len(admitted) == 12
+    # One request of burst, then one every 0.1s however many processes are waiting
+    assert admitted[-1] - admitted[0] >= 1.0
+    assert all(later - earlier >= 0.05 for earlier, later in zip(admitted[1:], admitted[2:]))
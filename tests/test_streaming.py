@@ -0,0 +1,81 @@
+# test_streaming.py
+"""Streaming output framing of send_query and the SSE parser, against the local mock server"""
+import pytest
+
+from conftest import MOCK_CONFIG
+
+@pytest.fixture(autouse=True)
+def mock_config(mock):
+    server = mock[0]
+    saved = dict(server.config)
+    server.config.update(MOCK_CONFIG)
+    yield server.config
+    server.config.clear()
+    server.config.update(saved)
+
+def stream_lines(pi, **kwargs):
+    lines = []
+    pi.send_query("Elon Musk", "Artificial Intelligence", emit=lines.append, stream=True, **kwargs)
+    return [str(line) for line in lines]
+
+def test_deltas_come_before_stream_end_and_the_answer_after(pi):
+    lines = stream_lines(pi)
+    end = lines.index("STREAM_END")
+    deltas = [line for line in lines if line.startswith("STREAM_DELTA:")]
+    assert deltas and lines[:end] == deltas
+    assert lines.count("STREAM_END") == 1
+    answer = lines[end + 1:]
+    assert len(answer) == 1 and not pi.is_fallback_output(answer)
+    assert "".join(pi.json.loads(line.split(":", 1)[1]) for line in deltas) == answer[0]
+
+def test_reasoning_deltas_go_to_stderr(pi, capsys):
+    lines = stream_lines(pi)
+    err = capsys.readouterr().err
+    assert not any(line.startswith("REASONING_DELTA:") for line in lines)
+    assert "REASONING_DELTA:" in err
+
+@pytest.mark.parametrize("fault, reason", [
+    ({"error_rate": 1.0}, "API_FAILED:HTTP_ERROR"),
+    ({"stream_fault": "drop"}, "API_FAILED:NETWORK_ERROR"),
+    ({"stream_fault": "invalid"}, "API_FAILED:INVALID_JSON"),
+])
+def test_failed_streams_end_before_the_fallback(pi, mock_config, fault, reason):
+    mock_config.update(fault)
+    lines = stream_lines(pi)
+    assert lines.count("STREAM_END") == 1
+    end = lines.index("STREAM_END")
+    assert not any(line.startswith("API_FAILED:") for line in lines[:end])
+    assert lines[end + 1] == reason
+    assert pi.is_fallback_output(lines[end + 1:])
+
+def test_stalled_stream_is_cut_off_at_the_deadline_keeping_the_text_so_far(pi, mock_config, monkeypatch):
+    monkeypatch.setattr(pi, "TURN_DEADLINE", 1.5)
+    mock_config.update(stream_fault="stall", slow_latency=5.0)
+    started = pi.time.monotonic()
+    lines = stream_lines(pi)
+    assert pi.time.monotonic() - started < 3.0
+    end = lines.index("STREAM_END")
+    deltas = "".join(pi.json.loads(line.split(":", 1)[1]) for line in lines[:end])
+    assert lines[end + 1:] == [deltas]
+    assert len(deltas.split()) == MOCK_CONFIG["answer_tokens"] // 2
+
+def test_failure_before_the_request_still_ends_the_stream(pi, monkeypatch):
+    monkeypatch.setattr(pi, "API_KEY", "")
+    lines = stream_lines(pi)
+    assert lines[0] == "STREAM_END"
+    assert lines[1] == "API_FAILED:INVALID_API_KEY"
+
+def test_sse_multi_line_data_is_joined(pi):
+    events = list(pi.iter_sse_events(["data: first", "data: second", "", "data:third", ""]))
+    assert events == ["first\nsecond", "third"]
+
+def test_sse_comments_and_other_fields_are_skipped(pi):
+    lines = [": keep-alive", "event: message", "id: 7", "data: payload", ":", "", ": trailing comment", ""]
+    assert list(pi.iter_sse_events(lines)) == ["payload"]
+
+def test_sse_crlf_and_bytes(pi):
+    lines = [b"data: {\"a\": 1}\r", b"\r", "data: [DONE]\r", "\r"]
+    assert list(pi.iter_sse_events(lines)) == ['{"a": 1}', "[DONE]"]
+
+def test_sse_unterminated_final_event_is_flushed(pi):
+    assert list(pi.iter_sse_events(["data: last"])) == ["last"]